@@ -65,22 +65,26 @@ options:
     control_file:
         description:
             - The path to the SQL*Loader control file on the remote host.
-        required: true
+            - Required unless I(batch) is used.
+        required: false
         type: str
     data_file:
         description:
             - The path to the data file to be loaded on the remote host.
-        required: true
+            - Required unless I(batch) is used.
+        required: false
         type: str
     log_file:
         description:
             - The path where the log file should be created on the remote host.
-        required: true
+            - Required unless I(batch) is used.
+        required: false
         type: str
     bad_file:
         description:
             - The path where the bad file should be created on the remote host.
-        required: true
+            - Required unless I(batch) is used.
+        required: false
         type: str
     direct:
         description:
@@ -207,6 +211,35 @@ options:
         required: false
         type: str
         choices: ['LTRIM', 'RTRIM', 'BOTH', 'NOTRIM']
+    batch:
+        description:
+            - A list of loads to run one after another in a single module invocation.
+            - The connection and optional parameters are shared by all loads.
+            - Mutually exclusive with I(control_file), I(data_file), I(log_file) and I(bad_file).
+        required: false
+        type: list
+        elements: dict
+        suboptions:
+            control_file:
+                description:
+                    - The path to the SQL*Loader control file on the remote host.
+                required: true
+                type: str
+            data_file:
+                description:
+                    - The path to the data file to be loaded on the remote host.
+                required: true
+                type: str
+            log_file:
+                description:
+                    - The path where the log file should be created on the remote host.
+                required: true
+                type: str
+            bad_file:
+                description:
+                    - The path where the bad file should be created on the remote host.
+                required: true
+                type: str
 requirements:
     - python >= 2.7/Python 3.6+
     - cx_Oracle
@@ -214,6 +247,7 @@ notes:
     - Requires Oracle SQL*Loader to be installed on the target machine.
     - The user running this module must have appropriate permissions to execute SQL*Loader.
     - All file paths should be on the remote host where SQL*Loader will be executed.
+    - When many options are set they are passed to SQL*Loader through a temporary parameter file, unless I(parfile) is given.
     - It is strongly recommended to use Ansible Vault for sensitive information like passwords.
 author:
     - Andavarapu Sampat Kalyan (@sampatkalyan)
@@ -254,6 +288,21 @@ EXAMPLES = r'''
     multithreading: true
     streamsize: '256000'
     trim: 'BOTH'
+
+- name: Load several files in one task
+  oracle_sqlloader:
+    connection_string: '@mydb'
+    wallet_location: /path/to/wallet
+    direct: true
+    batch:
+      - control_file: /path/on/remote/host/emp.ctl
+        data_file: /path/on/remote/host/emp.csv
+        log_file: /path/on/remote/host/emp.log
+        bad_file: /path/on/remote/host/emp.bad
+      - control_file: /path/on/remote/host/dept.ctl
+        data_file: /path/on/remote/host/dept.csv
+        log_file: /path/on/remote/host/dept.log
+        bad_file: /path/on/remote/host/dept.bad
 '''
 
 RETURN = r'''
@@ -266,19 +315,23 @@ message:
     type: str
     returned: always
 stdout:
-    description: Standard output of the SQL*Loader command
+    description:
+        - Standard output of the SQL*Loader command.
+        - Always empty, the console output is discarded. Load details are in the log file.
     type: str
     returned: always
 stderr:
-    description: Standard error of the SQL*Loader command
+    description:
+        - Standard error of the SQL*Loader command.
+        - On failure this also includes the tail of the log file.
     type: str
     returned: always
 records_loaded:
-    description: Number of records successfully loaded
+    description: Number of records successfully loaded, summed over all loads
     type: int
     returned: on success
 records_rejected:
-    description: Number of records rejected due to data errors
+    description: Number of records rejected due to data errors, summed over all loads
     type: int
     returned: on success
 rc:
@@ -286,29 +339,196 @@ rc:
     type: int
     returned: always
 cmd:
-    description: The command used to run SQL*Loader
+    description: The command used to run SQL*Loader, one line per load
     type: str
     returned: always
+results:
+    description: Per-load results, in the order the loads were run
+    type: list
+    elements: dict
+    returned: on success
+    contains:
+        cmd:
+            description: The command used to run SQL*Loader
+            type: str
+        log_file:
+            description: The log file of the load
+            type: str
+        records_loaded:
+            description: Number of records successfully loaded
+            type: int
+        records_rejected:
+            description: Number of records rejected due to data errors
+            type: int
 '''
 
 import os
 import re
-import subprocess
 
 from ansible.module_utils.basic import AnsibleModule
 
-def run_sqlloader(module, cmd):
+_LOADED_SUFFIX = b' Rows successfully loaded'
+_REJECTED_SUFFIX = b' Rows not loaded due to data errors'
+_LOADED_RE = re.compile(rb'(\d+) Rows successfully loaded')
+_REJECTED_RE = re.compile(rb'(\d+) Rows not loaded due to data errors')
+_CONN_PASSWORD_RE = re.compile(r'/[^@]*@')
+_LOG_TAIL_SIZE = 65536
+# Command lines longer than this are passed to sqlldr through a parfile
+_PARFILE_THRESHOLD = 8
+
+# (module parameter, sqlldr option, is boolean)
+_OPT_PARAMS = (
+    ('wallet_location', 'wallet_location', False),
+    ('wallet_password', 'wallet_password', False),
+    ('direct', 'direct', True),
+    ('parallel', 'parallel', True),
+    ('skip', 'skip', False),
+    ('load', 'load', False),
+    ('silent', 'silent', False),
+    ('errors', 'errors', False),
+    ('rows', 'rows', False),
+    ('bindsize', 'bindsize', False),
+    ('readsize', 'readsize', False),
+    ('external_table', 'external_table', False),
+    ('columnarrayrows', 'columnarrayrows', False),
+    ('parfile', 'parfile', False),
+    ('scratch_dir', 'scratch_dir', False),
+    ('discard_file', 'discard', False),
+    ('charset', 'charset', False),
+    ('date_cache', 'date_cache', False),
+    ('degree_of_parallelism', 'degree_of_parallelism', False),
+    ('direct_path_lock_wait', 'direct_path_lock_wait', True),
+    ('empty_lobs_are_null', 'empty_lobs_are_null', True),
+    ('multithreading', 'multithreading', True),
+    ('no_index_errors', 'no_index_errors', True),
+    ('skip_index_maintenance', 'skip_index_maintenance', True),
+    ('skip_unusable_indexes', 'skip_unusable_indexes', True),
+    ('streamsize', 'streamsize', False),
+    ('trim', 'trim', False),
+)
+
+_MODULE_ARGS = {
+    'username': {'type': 'str', 'required': False},
+    'password': {'type': 'str', 'required': False, 'no_log': True},
+    'sid': {'type': 'str', 'required': False},
+    'host': {'type': 'str', 'required': False},
+    'port': {'type': 'int', 'required': False},
+    'connection_string': {'type': 'str', 'required': False, 'no_log': True},
+    'wallet_location': {'type': 'str', 'required': False},
+    'wallet_password': {'type': 'str', 'required': False, 'no_log': True},
+    'control_file': {'type': 'str', 'required': False},
+    'data_file': {'type': 'str', 'required': False},
+    'log_file': {'type': 'str', 'required': False},
+    'bad_file': {'type': 'str', 'required': False},
+    'direct': {'type': 'bool', 'default': False},
+    'parallel': {'type': 'bool', 'default': False},
+    'skip': {'type': 'int'},
+    'load': {'type': 'int'},
+    'silent': {'type': 'str', 'choices': ['ALL', 'ERRORS', 'FEEDBACK', 'HEADER']},
+    'errors': {'type': 'int'},
+    'rows': {'type': 'int'},
+    'bindsize': {'type': 'str'},
+    'readsize': {'type': 'str'},
+    'external_table': {'type': 'str', 'choices': ['NOT_USED', 'GENERATE_ONLY', 'EXECUTE']},
+    'columnarrayrows': {'type': 'int'},
+    'parfile': {'type': 'str'},
+    'scratch_dir': {'type': 'str'},
+    'discard_file': {'type': 'str'},
+    'charset': {'type': 'str'},
+    'date_cache': {'type': 'int'},
+    'degree_of_parallelism': {'type': 'int'},
+    'direct_path_lock_wait': {'type': 'bool'},
+    'empty_lobs_are_null': {'type': 'bool'},
+    'multithreading': {'type': 'bool'},
+    'no_index_errors': {'type': 'bool'},
+    'skip_index_maintenance': {'type': 'bool'},
+    'skip_unusable_indexes': {'type': 'bool'},
+    'streamsize': {'type': 'str'},
+    'trim': {'type': 'str', 'choices': ['LTRIM', 'RTRIM', 'BOTH', 'NOTRIM']},
+    'batch': {'type': 'list', 'elements': 'dict', 'options': {
+        'control_file': {'type': 'str', 'required': True},
+        'data_file': {'type': 'str', 'required': True},
+        'log_file': {'type': 'str', 'required': True},
+        'bad_file': {'type': 'str', 'required': True},
+    }},
+}
+
+_FILE_PARAMS = ('control_file', 'data_file', 'log_file', 'bad_file')
+
+def read_log_tail(log_file):
+    """
+    Return the last part of the SQL*Loader log file as text.
+    """
+    if not os.path.exists(log_file):
+        return ''
+    with open(log_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - _LOG_TAIL_SIZE))
+        return f.read().decode('utf-8', errors='replace')
+
+def render_optional_params(params):
+    """
+    Yield the SQL*Loader options for the optional parameters that are set.
+    """
+    for param, cmd_option, is_bool in _OPT_PARAMS:
+        value = params[param]
+        if value is None:
+            continue
+        if is_bool:
+            value = 'true' if value else 'false'
+        yield f'{cmd_option}={value}'
+
+def write_parfile(options):
+    """
+    Write SQL*Loader options to a temporary parameter file and return its path.
+    """
+    import tempfile
+
+    with tempfile.NamedTemporaryFile('w', suffix='.par', delete=False) as f:
+        for option in options:
+            key, value = option.split('=', 1)
+            if ' ' in value:
+                value = f'"{value}"'
+            f.write(f'{key}={value}\n')
+    return f.name
+
+def run_sqlloader(module, cmd, cmd_str, log_file, completed=()):
     """
     Run the SQL*Loader command and return the results.
+    SQL*Loader writes everything of interest to its log file, so the console
+    output is discarded instead of being buffered in memory.
+    completed holds the results of the loads of a batch that already ran,
+    they are reported with a failure since their rows are committed.
     """
+    import subprocess
+
+    failed = dict(changed=bool(completed), results=list(completed))
     try:
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = proc.communicate()
-        if proc.returncode != 0:
-            module.fail_json(msg="SQL*Loader failed", rc=proc.returncode, stdout=stdout, stderr=stderr, cmd=' '.join(cmd))
-        return stdout, stderr, proc.returncode
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, close_fds=False, check=False)
     except Exception as e:
-        module.fail_json(msg=str(e), cmd=' '.join(cmd))
+        module.fail_json(msg=str(e), cmd=cmd_str, **failed)
+    stderr = proc.stderr.decode('utf-8', errors='replace')
+    if proc.returncode != 0:
+        stderr += read_log_tail(log_file)
+        module.fail_json(msg="SQL*Loader failed", rc=proc.returncode, stdout='', stderr=stderr, cmd=cmd_str, **failed)
+    return '', stderr, proc.returncode
+
+def find_count(content, suffix, pattern):
+    """
+    Return the number written right before suffix in content, or None.
+    Falls back to the regex pattern when the fixed suffix is not usable.
+    """
+    end = content.find(suffix)
+    if end != -1:
+        start = end
+        while start > 0 and content[start - 1:start].isdigit():
+            start -= 1
+        if start < end:
+            return int(content[start:end])
+    match = pattern.search(content)
+    if match:
+        return int(match.group(1))
+    return None
 
 def parse_log_file(log_file):
     """
@@ -318,58 +538,69 @@ def parse_log_file(log_file):
     records_rejected = 0
     
     if os.path.exists(log_file):
-        with open(log_file, 'r') as f:
-            content = f.read()
-            loaded_match = re.search(r'(\d+) Rows successfully loaded', content)
-            if loaded_match:
-                records_loaded = int(loaded_match.group(1))
-            rejected_match = re.search(r'(\d+) Rows not loaded due to data errors', content)
-            if rejected_match:
-                records_rejected = int(rejected_match.group(1))
+        with open(log_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            # The row counts are written in the log trailer, so only read the
+            # end of the file and widen the window until they are found.
+            window = _LOG_TAIL_SIZE
+            while True:
+                f.seek(max(0, size - window))
+                if window < size:
+                    f.readline()
+                content = f.read()
+                loaded = find_count(content, _LOADED_SUFFIX, _LOADED_RE)
+                if loaded is not None or window >= size:
+                    break
+                window *= 2
+            if loaded is not None:
+                records_loaded = loaded
+            rejected = find_count(content, _REJECTED_SUFFIX, _REJECTED_RE)
+            if rejected is not None:
+                records_rejected = rejected
     
     return records_loaded, records_rejected
 
-def run_module():
-    module_args = dict(
-        username=dict(type='str', required=False),
-        password=dict(type='str', required=False, no_log=True),
-        sid=dict(type='str', required=False),
-        host=dict(type='str', required=False),
-        port=dict(type='int', required=False),
-        connection_string=dict(type='str', required=False),
-        wallet_location=dict(type='str', required=False),
-        wallet_password=dict(type='str', required=False, no_log=True),
-        control_file=dict(type='str', required=True),
-        data_file=dict(type='str', required=True),
-        log_file=dict(type='str', required=True),
-        bad_file=dict(type='str', required=True),
-        direct=dict(type='bool', default=False),
-        parallel=dict(type='bool', default=False),
-        skip=dict(type='int'),
-        load=dict(type='int'),
-        silent=dict(type='str', choices=['ALL', 'ERRORS', 'FEEDBACK', 'HEADER']),
-        errors=dict(type='int'),
-        rows=dict(type='int'),
-        bindsize=dict(type='str'),
-        readsize=dict(type='str'),
-        external_table=dict(type='str', choices=['NOT_USED', 'GENERATE_ONLY', 'EXECUTE']),
-        columnarrayrows=dict(type='int'),
-        parfile=dict(type='str'),
-        scratch_dir=dict(type='str'),
-        discard_file=dict(type='str'),
-        charset=dict(type='str'),
-        date_cache=dict(type='int'),
-        degree_of_parallelism=dict(type='int'),
-        direct_path_lock_wait=dict(type='bool'),
-        empty_lobs_are_null=dict(type='bool'),
-        multithreading=dict(type='bool'),
-        no_index_errors=dict(type='bool'),
-        skip_index_maintenance=dict(type='bool'),
-        skip_unusable_indexes=dict(type='bool'),
-        streamsize=dict(type='str'),
-        trim=dict(type='str', choices=['LTRIM', 'RTRIM', 'BOTH', 'NOTRIM']),
+def run_load(module, conn, conn_masked, files, options, completed=()):
+    """
+    Run SQL*Loader for one set of control, data, log and bad files.
+    """
+    cmd = [
+        'sqlldr',
+        f'userid={conn}',
+        f'control={files["control_file"]}',
+        f'data={files["data_file"]}',
+        f'log={files["log_file"]}',
+        f'bad={files["bad_file"]}',
+        *options
+    ]
+
+    # Never return the password to the controller
+    cmd_str = ' '.join([cmd[0], f'userid={conn_masked}'] + cmd[2:])
+
+    # Keep argv short by moving everything after userid into a parfile,
+    # unless the user already supplied their own parfile.
+    parfile_path = None
+    if len(cmd) > _PARFILE_THRESHOLD and module.params['parfile'] is None:
+        parfile_path = write_parfile(cmd[2:])
+        cmd = cmd[:2] + [f'parfile={parfile_path}']
+
+    try:
+        _, stderr, _ = run_sqlloader(module, cmd, cmd_str, files['log_file'], completed)
+    finally:
+        if parfile_path:
+            os.unlink(parfile_path)
+
+    records_loaded, records_rejected = parse_log_file(files['log_file'])
+    return dict(
+        cmd=cmd_str,
+        log_file=files['log_file'],
+        stderr=stderr,
+        records_loaded=records_loaded,
+        records_rejected=records_rejected
     )
 
+def run_module():
     result = dict(
         changed=False,
         message='',
@@ -378,12 +609,16 @@ def run_module():
         rc=0,
         cmd='',
         records_loaded=0,
-        records_rejected=0
+        records_rejected=0,
+        results=[]
     )
 
     module = AnsibleModule(
-        argument_spec=module_args,
-        supports_check_mode=True
+        argument_spec=_MODULE_ARGS,
+        supports_check_mode=True,
+        required_one_of=[('control_file', 'batch')],
+        required_together=[_FILE_PARAMS],
+        mutually_exclusive=[(param, 'batch') for param in _FILE_PARAMS]
     )
 
     if module.check_mode:
@@ -391,84 +626,31 @@ def run_module():
         result['message'] = 'Check mode: SQL*Loader operation would be performed'
         module.exit_json(**result)
 
-    # Check if files exist on remote host
-    for file_param in ['control_file', 'data_file']:
-        if not os.path.exists(module.params[file_param]):
-            module.fail_json(msg=f"File not found on remote host: {module.params[file_param]}")
-
-    # Check if directories for log and bad files exist
-    for file_param in ['log_file', 'bad_file']:
-        directory = os.path.dirname(module.params[file_param])
-        if not os.path.exists(directory):
-            module.fail_json(msg=f"Directory not found on remote host for {file_param}: {directory}")
-
     if module.params['connection_string']:
         conn = module.params['connection_string']
+        conn_masked = _CONN_PASSWORD_RE.sub('/****@', conn, count=1)
     else:
         conn = f"{module.params['username']}/{module.params['password']}@{module.params['host']}:{module.params['port']}/{module.params['sid']}"
+        conn_masked = f"{module.params['username']}/****@{module.params['host']}:{module.params['port']}/{module.params['sid']}"
 
-    cmd = [
-        'sqlldr',
-        f'userid={conn}',
-        f'control={module.params["control_file"]}',
-        f'data={module.params["data_file"]}',
-        f'log={module.params["log_file"]}',
-        f'bad={module.params["bad_file"]}'
-    ]
-
-    # Add all the optional parameters
-    optional_params = [
-        ('wallet_location', 'wallet_location'),
-        ('wallet_password', 'wallet_password'),
-        ('direct', 'direct'),
-        ('parallel', 'parallel'),
-        ('skip', 'skip'),
-        ('load', 'load'),
-        ('silent', 'silent'),
-        ('errors', 'errors'),
-        ('rows', 'rows'),
-        ('bindsize', 'bindsize'),
-        ('readsize', 'readsize'),
-        ('external_table', 'external_table'),
-        ('columnarrayrows', 'columnarrayrows'),
-        ('parfile', 'parfile'),
-        ('scratch_dir', 'scratch_dir'),
-        ('discard_file', 'discard'),
-        ('charset', 'charset'),
-        ('date_cache', 'date_cache'),
-        ('degree_of_parallelism', 'degree_of_parallelism'),
-        ('direct_path_lock_wait', 'direct_path_lock_wait'),
-        ('empty_lobs_are_null', 'empty_lobs_are_null'),
-        ('multithreading', 'multithreading'),
-        ('no_index_errors', 'no_index_errors'),
-        ('skip_index_maintenance', 'skip_index_maintenance'),
-        ('skip_unusable_indexes', 'skip_unusable_indexes'),
-        ('streamsize', 'streamsize'),
-        ('trim', 'trim'),
-    ]
-
-    for param, cmd_option in optional_params:
-        if module.params[param] is not None:
-            if isinstance(module.params[param], bool):
-                cmd.append(f'{cmd_option}={"true" if module.params[param] else "false"}')
-            else:
-                cmd.append(f'{cmd_option}={module.params[param]}')
+    # The optional parameters are shared by every load, render them once
+    options = list(render_optional_params(module.params))
 
-        result['cmd'] = ' '.join(cmd)
+    loads = module.params['batch'] or [{param: module.params[param] for param in _FILE_PARAMS}]
+    stderr = []
+    for files in loads:
+        load_result = run_load(module, conn, conn_masked, files, options, result['results'])
+        stderr.append(load_result.pop('stderr'))
+        result['results'].append(load_result)
+        result['records_loaded'] += load_result['records_loaded']
+        result['records_rejected'] += load_result['records_rejected']
 
-        stdout, stderr, rc = run_sqlloader(module, cmd)
+    result['changed'] = True
+    result['message'] = 'SQL*Loader executed successfully'
+    result['cmd'] = '\n'.join(item['cmd'] for item in result['results'])
+    result['stderr'] = ''.join(stderr)
 
-        result['changed'] = True
-        result['message'] = 'SQL*Loader executed successfully'
-        result['stdout'] = stdout
-        result['stderr'] = stderr
-        result['rc'] = rc
-
-        records_loaded, records_rejected = parse_log_file(module.params['log_file'])
-        result['records_loaded'] = records_loaded
-        result['records_rejected'] = records_rejected
-
-        module.exit_json(**result)
+    module.exit_json(**result)
 
 def main():
     run_module()
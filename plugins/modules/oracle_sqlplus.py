@@ -8,6 +8,11 @@ import os
 import subprocess
 import logging
 import re
+import shutil
+import stat
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 ANSIBLE_METADATA = {
@@ -17,9 +22,19 @@ ANSIBLE_METADATA = {
 }
 
 
-# Initialize logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+_ROWS_RE = re.compile(r'(\d+) rows')
+# Substitution variables (&1) and bind variables (:name) in one alternation
+_VARIABLE_RE = re.compile(r'&(\d+)|:(\w+)')
+_STMT_PREFIXES = ("select", "insert", "update", "delete", "merge")
+_ERROR_TAIL_LINES = 20
+# Environment inherited by every SQL*Plus process, env_variables are layered on top
+_BASE_ENV = os.environ.copy()
+# os.stat results per script path, loop items often reuse the same script
+_STAT_CACHE = {}
+
+# Logging is configured in run_module only when debug is enabled
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
 DOCUMENTATION = '''
 ---
@@ -115,6 +130,10 @@ options:
     loop:
         description:
             - A list of dictionaries containing SQL files or raw SQL to be executed in a loop.
+            - Every item needs a `script` or `raw_sql`, either of its own or from the top level options.
+            - Items with the same connection and environment run one after another in a single SQL*Plus session,
+              so `SET`, `DEFINE` and `WHENEVER` settings and any uncommitted transaction carry over to the next item.
+            - End an item with `COMMIT` when a later item must not be able to roll back its changes.
         required: false
         type: list
         elements: dict
@@ -131,6 +150,20 @@ options:
         required: false
         type: int
         default: 1000
+    max_parallel:
+        description:
+            - Maximum number of SQL*Plus processes to run at once for loop items.
+            - Items with the same connection and environment still run one after another on a shared SQL*Plus session.
+            - Only raise this when items on different connections do not depend on each other.
+        required: false
+        type: int
+        default: 1
+    debug:
+        description:
+            - Log module activity, including unexpected errors, to stderr.
+        required: false
+        type: bool
+        default: false
 notes:
     - This module has been tested with Oracle 11g, 12c, and 19c.
     - It is strongly recommended to use Ansible Vault for sensitive information like passwords.
@@ -217,14 +250,49 @@ results:
             returned: for DML statements
 '''
 
+class _ParamShim:
+    """Lightweight stand-in for AnsibleModule carrying per-loop-item params."""
+    def __init__(self, params, parent, fail_json=None):
+        self.params = params
+        self.fail_json = fail_json or parent.fail_json
+
+class _ItemFailed(Exception):
+    """Raised in place of fail_json by loop items running in a worker thread."""
+    def __init__(self, kwargs):
+        super().__init__(kwargs.get('msg'))
+        self.kwargs = kwargs
+
+def _raise_item_failed(**kwargs):
+    raise _ItemFailed(kwargs)
+
+def _script_ok(path):
+    """Check that path is a regular file, calling os.stat once per path."""
+    st = _STAT_CACHE.get(path)
+    if st is None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = False
+        _STAT_CACHE[path] = st
+    return bool(st) and stat.S_ISREG(st.st_mode)
+
 def validate_input(module):
-    """Validate input parameters."""
-    if not module.params['script'] and not module.params['raw_sql'] and not module.params['loop']:
+    """Validate input parameters, including every loop item before any of them runs."""
+    params = module.params
+    if not params['script'] and not params['raw_sql'] and not params['loop']:
         module.fail_json(msg="Either 'script', 'raw_sql', or 'loop' must be specified")
-    if module.params['script'] and module.params['raw_sql']:
+    if params['script'] and params['raw_sql']:
         module.fail_json(msg="Specify either 'script' or 'raw_sql', not both")
-    if module.params['script'] and not os.path.exists(module.params['script']):
-        module.fail_json(msg=f"SQL file {module.params['script']} not found")
+
+    scripts = [params['script']]
+    for index, item in enumerate(params['loop'], start=1):
+        script = item['script'] if 'script' in item else params['script']
+        if not script and not item.get('raw_sql', params['raw_sql']):
+            module.fail_json(msg=f"Loop item {index} needs either 'script' or 'raw_sql'")
+        scripts.append(script)
+    for script in scripts:
+        if script and not _script_ok(script):
+            module.fail_json(msg=f"SQL file {script} not found")
 
 def check_sqlplus_installed(module):
     """Check if SQL*Plus is installed."""
@@ -235,24 +303,74 @@ def check_sqlplus_installed(module):
     except FileNotFoundError:
         module.fail_json(msg="SQL*Plus not installed or not found in PATH.")
 
-def execute_sqlplus(module, result):
-    """Execute SQL*Plus command."""
-    username = module.params['username']
-    password = module.params['password']
-    database = module.params['database']
-    script = module.params['script']
-    raw_sql = module.params['raw_sql']
-    substitution_variables = module.params['substitution_variables']
-    bind_variables = module.params['bind_variables']
-    env_variables = module.params['env_variables']
-    sysdba = module.params['sysdba']
-    sysoper = module.params['sysoper']
-    silent = module.params['silent']
-    nolog = module.params['nolog']
-    suppress_login = module.params['suppress_login']
-    markup_mode = module.params['markup_mode']
-    restrict = module.params['restrict']
-    page_size = module.params['page_size']
+class SqlplusSession:
+    """Long-running SQL*Plus process that runs several scripts over one connection."""
+    def __init__(self, sqlplus_cmd, env):
+        self.sqlplus_cmd = sqlplus_cmd
+        self.env = env
+        self.sentinel = f"__ANSIBLE_DONE_{uuid.uuid4().hex}__"
+        self.process = None
+        self.returncode = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start(self):
+        self.process = subprocess.Popen(self.sqlplus_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, env=self.env, encoding='utf-8', bufsize=1)
+        self.returncode = None
+
+    def _write(self, data):
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            # SQL*Plus exited early, the reader picks up its output and return code
+            pass
+
+    def run(self, sql_script):
+        """Run a script and return its output, restarting SQL*Plus if a previous script exited it."""
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+
+        # A lone '.' ends any unterminated statement so the sentinel PROMPT is always executed
+        data = f"{sql_script}\n.\nPROMPT {self.sentinel}\n"
+        # Daemon, a writer stuck on a full pipe must not keep the module process alive
+        writer = threading.Thread(target=self._write, args=(data,), daemon=True)
+        writer.start()
+
+        output = []
+        try:
+            for line in iter(self.process.stdout.readline, ''):
+                if line.rstrip().endswith(self.sentinel):
+                    break
+                output.append(line)
+            else:
+                self.returncode = self.process.wait()
+        except BaseException:
+            # Nobody reads SQL*Plus any more, stop it before it blocks on a full pipe
+            self.process.kill()
+            self.returncode = self.process.wait()
+            raise
+        writer.join()
+
+        return ''.join(output).strip()
+
+    def close(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.stdin.close()
+            self.returncode = self.process.wait()
+        self.process = None
+
+def build_sql_script(params):
+    """Build the SQL text for a script or raw SQL, with variables substituted."""
+    script = params['script']
+    raw_sql = params['raw_sql']
+    substitution_variables = params['substitution_variables']
+    bind_variables = params['bind_variables']
 
     if script:
         with open(script, 'r') as file:
@@ -260,98 +378,226 @@ def execute_sqlplus(module, result):
     else:
         sql_script = raw_sql
 
-    # Replace substitution variables
-    for i, value in enumerate(substitution_variables, start=1):
-        subst_var = f'&{i}'
-        sql_script = sql_script.replace(subst_var, str(value))
+    # Bind variables are only handled for raw SQL
+    subst_map = {str(i): str(value) for i, value in enumerate(substitution_variables, start=1)}
+    bind_map = {var: f"'{value}'" for var, value in bind_variables.items()} if raw_sql else {}
+    if not subst_map and not bind_map:
+        return sql_script
+
+    def replace(match):
+        if match.group(1) is not None:
+            return subst_map.get(match.group(1), match.group(0))
+        return bind_map.get(match.group(2), match.group(0))
 
-    # Handle bind variables for raw SQL
-    if raw_sql and bind_variables:
-        for var, value in bind_variables.items():
-            sql_script = sql_script.replace(f":{var}", f"'{value}'")
+    return _VARIABLE_RE.sub(replace, sql_script)
+
+def build_sqlplus_command(params):
+    """Build the SQL*Plus command line."""
+    username = params['username']
+    password = params['password']
+    database = params['database']
 
-    # Construct SQL*Plus command
     sqlplus_cmd = ['sqlplus']
-    if silent:
+    if params['silent']:
         sqlplus_cmd.append('-S')
-    if nolog:
+    if params['nolog']:
         sqlplus_cmd.append('/NOLOG')
-    if suppress_login:
+    if params['suppress_login']:
         sqlplus_cmd.append('-s')
-    if markup_mode:
-        sqlplus_cmd.extend(['-M', markup_mode])
-    if restrict:
+    if params['markup_mode']:
+        sqlplus_cmd.extend(['-M', params['markup_mode']])
+    if params['restrict']:
         sqlplus_cmd.append('-R')
 
     if username and password and database:
         conn_str = f"{username}/{password}@{database}"
     else:
-        conn_str = '/ as sysdba' if sysdba else '/ as sysoper' if sysoper else ''
+        conn_str = '/ as sysdba' if params['sysdba'] else '/ as sysoper' if params['sysoper'] else ''
 
     sqlplus_cmd.append(conn_str)
+    return sqlplus_cmd
 
-    # Prepare environment variables
-    env = os.environ.copy()
-    env.update(env_variables)
+def build_env(params):
+    """Prepare environment variables for SQL*Plus."""
+    env_variables = params['env_variables']
+    if not env_variables:
+        return _BASE_ENV
+    return {**_BASE_ENV, **env_variables}
 
+def feed_stdin(stream, data):
+    """Write data to a child's stdin and close it."""
+    try:
+        stream.write(data)
+        stream.close()
+    except BrokenPipeError:
+        # SQL*Plus exited before reading everything, its return code says why
+        pass
+
+def copy_script_to_stdin(stream, file):
+    """Copy an open script file to a child's stdin in chunks, then close both."""
+    try:
+        with file:
+            shutil.copyfileobj(file, stream, 65536)
+    except BrokenPipeError:
+        # SQL*Plus exited before reading everything, its return code says why
+        pass
+    finally:
+        # SQL*Plus waits for end of input, so stdin is closed whatever happened
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
+
+def execute_sqlplus(module, result, session=None):
+    """Execute SQL*Plus command, reusing the given session if any."""
+    params = module.params
+    page_size = params['page_size']
+    # A script without substitution variables goes to SQL*Plus as is, no need to hold it in memory
+    stream_script = session is None and params['script'] and not params['substitution_variables']
+    if not stream_script:
+        sql_script = build_sql_script(params)
 
-    # Execute SQL script using SQL*Plus
     start_time = datetime.now()
-    process = subprocess.Popen(sqlplus_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
-    stdout, stderr = process.communicate(input=sql_script.encode())
+    if session is None:
+        # Opened here so an unreadable script fails the task before SQL*Plus starts
+        script_file = open(params['script'], 'rb') if stream_script else None
+        process = subprocess.Popen(build_sqlplus_command(params), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, env=build_env(params))
+        # Daemon, a writer stuck on a full pipe must not keep the module process alive
+        if stream_script:
+            writer = threading.Thread(target=copy_script_to_stdin, args=(process.stdin, script_file), daemon=True)
+        else:
+            writer = threading.Thread(target=feed_stdin, args=(process.stdin, sql_script.encode()), daemon=True)
+        writer.start()
+
+        # Parse the output while SQL*Plus is still producing it
+        lines = []
+
+        def read_lines():
+            for line in iter(process.stdout.readline, b''):
+                line = line.decode('utf-8').rstrip('\r\n')
+                lines.append(line)
+                yield line
+
+        try:
+            parsed = list(parse_sqlplus_output_stream(read_lines(), page_size))
+        except BaseException:
+            # Nobody reads SQL*Plus any more, stop it before it blocks on a full pipe
+            process.kill()
+            process.wait()
+            raise
+        process.wait()
+        writer.join()
+        output = '\n'.join(lines).strip()
+        if process.returncode != 0:
+            module.fail_json(msg=f"SQL*Plus execution failed: {error_tail(output)}")
+    else:
+        output = session.run(sql_script)
+        if session.returncode:
+            module.fail_json(msg=f"SQL*Plus execution failed: {error_tail(output)}")
+        parsed = parse_sqlplus_output(output, page_size)
     end_time = datetime.now()
 
-    if process.returncode != 0:
-        module.fail_json(msg=f"SQL*Plus execution failed: {stderr.decode('utf-8').strip()}")
+    record_output(result, output, (end_time - start_time).total_seconds(), parsed)
 
-    result['sqlplus_output'] = stdout.decode('utf-8').strip()
-    result['execution_time'] = (end_time - start_time).total_seconds()
-    result['changed'] = True
+def error_tail(output):
+    """Last lines of SQL*Plus output, where it reports why it stopped."""
+    return '\n'.join(output.splitlines()[-_ERROR_TAIL_LINES:])
 
-    # Parse output for more detailed results
-    result['results'].extend(parse_sqlplus_output(result['sqlplus_output'], page_size))
+def record_output(result, output, execution_time, parsed):
+    """Add the output of one execution to the module result."""
+    # Loop items append to the output of the previous items
+    if result['sqlplus_output']:
+        result['sqlplus_output'] += '\n'
+    result['sqlplus_output'] += output
+    result['execution_time'] += execution_time
+    result['changed'] = True
+    result['results'].extend(parsed)
+
+def session_key(params):
+    """Key identifying loop items that can share one SQL*Plus process."""
+    return (tuple(build_sqlplus_command(params)), tuple(sorted((k, str(v)) for k, v in params['env_variables'].items())))
+
+def run_loop_parallel(module, result):
+    """Run loop items with up to max_parallel SQL*Plus processes, one per connection."""
+    groups = {}
+    for index, item in enumerate(module.params['loop']):
+        item_module = _ParamShim({**module.params, **item}, module, _raise_item_failed)
+        groups.setdefault(session_key(item_module.params), []).append((index, item_module))
+
+    item_results = [None] * len(module.params['loop'])
+
+    def run_group(members):
+        first = members[0][1].params
+        with SqlplusSession(build_sqlplus_command(first), build_env(first)) as session:
+            for index, item_module in members:
+                item_result = dict(changed=False, sqlplus_output='', execution_time=0, results=[])
+                item_results[index] = item_result
+                execute_sqlplus(item_module, item_result, session)
+
+    with ThreadPoolExecutor(max_workers=module.params['max_parallel']) as executor:
+        futures = [executor.submit(run_group, members) for members in groups.values()]
+    errors = [future.exception() for future in futures if future.exception() is not None]
+
+    # Merge in item order so the output does not depend on which worker finished first
+    for item_result in item_results:
+        if item_result is not None and item_result['changed']:
+            record_output(result, item_result['sqlplus_output'], item_result['execution_time'], item_result['results'])
+
+    for error in errors:
+        if isinstance(error, _ItemFailed):
+            module.fail_json(**{**result, **error.kwargs})
+    if errors:
+        raise errors[0]
 
 def parse_sqlplus_output(output, page_size):
     """Parse SQL*Plus output for more structured results."""
-    results = []
+    # Output of DDL-only scripts has no statement to report and is shorter than a page
+    low = output.lower()
+    if not any(prefix in low for prefix in _STMT_PREFIXES) and output.count('\n') + 1 < page_size:
+        return []
+    return list(parse_sqlplus_output_stream(output.split('\n'), page_size))
+
+def parse_sqlplus_output_stream(lines, page_size):
+    """Parse SQL*Plus output lines as they arrive, yielding one result per statement or page."""
     current_statement = ""
     current_output = []
     rows_affected = 0
 
-    for line in output.split('\n'):
-        if line.strip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE", "MERGE")):
+    for line in lines:
+        low = line.lower()
+        if low.lstrip().startswith(_STMT_PREFIXES):
             if current_statement:
-                results.append({
+                yield {
                     'statement': current_statement,
                     'output': '\n'.join(current_output),
                     'rows_affected': rows_affected
-                })
+                }
             current_statement = line
             current_output = []
             rows_affected = 0
-        elif "rows selected" in line.lower() or "rows affected" in line.lower():
-            match = re.search(r'(\d+) rows', line)
+        elif "rows selected" in low or "rows affected" in low:
+            match = _ROWS_RE.search(line)
             if match:
                 rows_affected = int(match.group(1))
         else:
             current_output.append(line)
 
+        # Lines arrive one at a time, so a full page is the whole buffer
         if len(current_output) >= page_size:
-            results.append({
+            yield {
                 'statement': current_statement,
-                'output': '\n'.join(current_output[:page_size]),
+                'output': '\n'.join(current_output),
                 'rows_affected': rows_affected
-            })
-            current_output = current_output[page_size:]
+            }
+            current_output = []
 
     if current_statement:
-        results.append({
+        yield {
             'statement': current_statement,
             'output': '\n'.join(current_output),
             'rows_affected': rows_affected
-        })
-
-    return results
+        }
 
 def run_module():
     module_args = dict(
@@ -371,7 +617,9 @@ def run_module():
         markup_mode=dict(type='str', required=False, choices=['HTML', 'XML']),
         loop=dict(type='list', elements='dict', required=False, default=[]),
         restrict=dict(type='bool', required=False, default=False),
-        page_size=dict(type='int', required=False, default=1000)
+        page_size=dict(type='int', required=False, default=1000),
+        max_parallel=dict(type='int', required=False, default=1),
+        debug=dict(type='bool', required=False, default=False)
     )
 
     result = dict(
@@ -388,17 +636,28 @@ def run_module():
         supports_check_mode=True
     )
 
+    if module.params['debug']:
+        logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
     try:
         validate_input(module)
         check_sqlplus_installed(module)
         
-        if module.params['loop']:
-            for item in module.params['loop']:
-                temp_params = module.params.copy()
-                temp_params.update(item)
-                temp_module = AnsibleModule(argument_spec=module_args, supports_check_mode=True)
-                temp_module.params = temp_params
-                execute_sqlplus(temp_module, result)
+        if module.params['loop'] and module.params['max_parallel'] > 1:
+            run_loop_parallel(module, result)
+        elif module.params['loop']:
+            # Items with the same command line and environment share one SQL*Plus process
+            sessions = {}
+            try:
+                for item in module.params['loop']:
+                    item_module = _ParamShim({**module.params, **item}, module)
+                    key = session_key(item_module.params)
+                    if key not in sessions:
+                        sessions[key] = SqlplusSession(list(key[0]), build_env(item_module.params))
+                    execute_sqlplus(item_module, result, sessions[key])
+            finally:
+                for session in sessions.values():
+                    session.close()
         else:
             execute_sqlplus(module, result)
 
@@ -103,10 +103,29 @@ db_type:
     type: str
 '''
 
-def run_sql_command(module, conn_str, sql_commands):
+_POOLS = {}
+
+def get_pool(user, password, dsn):
+    """Return a session pool for user@dsn, creating it on first use."""
+    key = (user, dsn)
+    pool = _POOLS.get(key)
+    if pool is None:
+        pool = cx_Oracle.SessionPool(user=user, password=password, dsn=dsn, min=1, max=4, increment=1,
+                                     threaded=False, homogeneous=True)
+        pool.stmtcachesize = 50
+        _POOLS[key] = pool
+    return pool
+
+def run_sql_command(module, user, password, dsn, sql_commands):
+    """
+    Run the SQL statements in order on one pooled connection and commit.
+    """
     try:
-        with cx_Oracle.connect(conn_str) as connection:
+        pool = get_pool(user, password, dsn)
+        with pool.acquire() as connection:
             with connection.cursor() as cursor:
+                # Fetch rows in large batches rather than cx_Oracle's default of 100
+                cursor.arraysize = 1000
                 for sql in sql_commands:
                     cursor.execute(sql)
             connection.commit()
@@ -120,8 +139,7 @@ def create_database(module, db_type, db_name, oracle_home, oracle_sid, db_admin_
     elif db_type == 'PDB':
         sql_commands = [f"CREATE PLUGGABLE DATABASE {db_name}"]
     
-    conn_str = f"{db_admin_user}/{db_admin_password}@{oracle_sid}"
-    run_sql_command(module, conn_str, sql_commands)
+    run_sql_command(module, db_admin_user, db_admin_password, oracle_sid, sql_commands)
     module.exit_json(changed=True, msg=f"{db_type} {db_name} created.", db_name=db_name, state='present', db_type=db_type)
 
 def drop_database(module, db_type, db_name, oracle_home, oracle_sid, db_admin_user, db_admin_password):
@@ -130,8 +148,7 @@ def drop_database(module, db_type, db_name, oracle_home, oracle_sid, db_admin_us
     elif db_type == 'PDB':
         sql_commands = [f"DROP PLUGGABLE DATABASE {db_name}"]
     
-    conn_str = f"{db_admin_user}/{db_admin_password}@{oracle_sid}"
-    run_sql_command(module, conn_str, sql_commands)
+    run_sql_command(module, db_admin_user, db_admin_password, oracle_sid, sql_commands)
     module.exit_json(changed=True, msg=f"{db_type} {db_name} dropped.", db_name=db_name, state='absent', db_type=db_type)
 
 def main():
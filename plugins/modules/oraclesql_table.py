@@ -2,6 +2,9 @@
 # Copyright: (c) 2024, Andavarapu Sampat Kalyan <sampatkalyana@gmail.com>
 # Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
 
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
 ANSIBLE_METADATA = {
     'metadata_version': '0.1',
     'status': ['preview'],
@@ -14,9 +17,6 @@ ANSIBLE_METADATA = {
 # Copyright: (c) 2024, Your Name <youremail@example.com>
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
-from __future__ import absolute_import, division, print_function
-__metaclass__ = type
-
 DOCUMENTATION = r'''
 ---
 module: sampatkalyan.oracle_sql.oraclesql_table
@@ -288,43 +288,136 @@ table:
         "row_movement": true,
         "comment": "Table for storing user information"
     }
+plan:
+    description: The DDL statements the module would run for the table.
+    type: list
+    elements: str
+    returned: when check_mode is enabled and the table is created or modified
+    sample: ["ALTER TABLE USERS ADD LAST_LOGIN DATE", "CREATE INDEX IDX_USERS_LOGIN ON USERS (LAST_LOGIN)"]
 '''
 
+import re
 import cx_Oracle
 from ansible.module_utils.basic import AnsibleModule
 
-def create_table(cursor, table_info):
+_IDENT_RE = re.compile(r'[A-Z][A-Z0-9_$#]*', re.I)
+
+def _q(name):
+    """Validate an unquoted identifier and return it in the upper case Oracle stores it in."""
+    # fullmatch, a $ anchor would still let a trailing newline through
+    if not _IDENT_RE.fullmatch(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return name.upper()
+
+_POOLS = {}
+
+# Existing table state per (dsn, user, table), dropped whenever this module changes the table
+_STATE_CACHE = {}
+_STATE_CACHE_SIZE = 256
+
+def get_pool(user, password, dsn):
+    """Return a session pool for user@dsn, creating it on first use."""
+    key = (user, dsn)
+    pool = _POOLS.get(key)
+    if pool is None:
+        pool = cx_Oracle.SessionPool(user=user, password=password, dsn=dsn, min=1, max=4, increment=1,
+                                     threaded=False, homogeneous=True)
+        pool.stmtcachesize = 100
+        _POOLS[key] = pool
+    return pool
+
+# SYS.ODCIVARCHAR2LIST type per pooled connection, describing it costs a round trip
+_LIST_TYPES = {}
+
+def string_list(connection, values):
+    """Return a SYS.ODCIVARCHAR2LIST of values, describing the type once per connection."""
+    list_type = _LIST_TYPES.get(connection)
+    if list_type is None:
+        list_type = _LIST_TYPES[connection] = connection.gettype("SYS.ODCIVARCHAR2LIST")
+    return list_type.newobject(values)
+
+# Fixed block text, so it is parsed once and then served from the statement cache
+_STATEMENT_LOOP_BLOCK = """
+DECLARE
+    statements SYS.ODCIVARCHAR2LIST := :statements;
+BEGIN
+    FOR i IN 1 .. statements.COUNT LOOP
+        BEGIN
+            EXECUTE IMMEDIATE statements(i);
+        EXCEPTION WHEN OTHERS THEN
+            RAISE_APPLICATION_ERROR(-20000, 'Failed: ' || SUBSTR(statements(i), 1, 1000), TRUE);
+        END;
+    END LOOP;
+END;
+"""
+
+def execute_statements(cursor, statements):
+    """
+    Run DDL statements in one anonymous PL/SQL block, so the whole batch
+    is a single round trip. A failing statement is named in the error.
+    """
+    if not statements:
+        return
+    # SYS.ODCIVARCHAR2LIST elements are VARCHAR2(4000)
+    if all(len(statement.encode()) <= 4000 for statement in statements):
+        statement_list = string_list(cursor.connection, statements)
+        cursor.execute(_STATEMENT_LOOP_BLOCK, statements=statement_list)
+        return
+    block = ["BEGIN"]
+    for i in range(1, len(statements) + 1):
+        block.append(f"  BEGIN EXECUTE IMMEDIATE :s{i}; EXCEPTION WHEN OTHERS THEN "
+                     f"RAISE_APPLICATION_ERROR(-20000, 'Failed: ' || SUBSTR(:s{i}, 1, 1000), TRUE); END;")
+    block.append("END;")
+    cursor.execute("\n".join(block), {f"s{i}": statement for i, statement in enumerate(statements, start=1)})
+
+def _range_part(part):
+    return f"PARTITION {_q(part['name'])} VALUES LESS THAN ({part['value_less_than']})"
+
+def _list_part(part):
+    return f"PARTITION {_q(part['name'])} VALUES ({', '.join(part['values'])})"
+
+def _hash_part(part):
+    return f"PARTITION {_q(part['name'])}"
+
+# Partition clause builder per partitioning type
+_PART_BUILDERS = {
+    'RANGE': _range_part,
+    'LIST': _list_part,
+    'HASH': _hash_part,
+}
+
+def plan_create(table_info):
+    """Return the DDL that creates the table, without running it."""
+    table_name = _q(table_info['table_name'])
+    statements = []
     columns = []
     for col in table_info['columns']:
-        col_def = f"{col['name']} {col['type']}"
-        if not col.get('nullable', True):
-            col_def += " NOT NULL"
+        col_def = f"{_q(col['name'])} {col['type']}"
+        # DEFAULT has to come before the inline NOT NULL constraint
         if col.get('default'):
             col_def += f" DEFAULT {col['default']}"
-        if col.get('check'):
-            col_def += f" CHECK ({col['check']})"
+        if not col.get('nullable', True):
+            col_def += " NOT NULL"
         columns.append(col_def)
     
-    primary_key = next((col['name'] for col in table_info['columns'] if col.get('primary_key')), None)
+    primary_key = next((_q(col['name']) for col in table_info['columns'] if col.get('primary_key')), None)
     if primary_key:
-        columns.append(f"CONSTRAINT pk_{table_info['name']} PRIMARY KEY ({primary_key})")
+        columns.append(f"CONSTRAINT PK_{table_name} PRIMARY KEY ({primary_key})")
+    # Named the way plan_changes expects them, so a re-run finds them in place
+    for col in table_info['columns']:
+        if col.get('unique'):
+            columns.append(f"CONSTRAINT UK_{table_name}_{_q(col['name'])} UNIQUE ({_q(col['name'])})")
+        if col.get('check'):
+            columns.append(f"CONSTRAINT CK_{table_name}_{_q(col['name'])} CHECK ({col['check']})")
     
-    query = f"CREATE {'TEMPORARY ' if table_info.get('temporary') else ''}TABLE {table_info['name']} ({', '.join(columns)})"
+    query = f"CREATE {'TEMPORARY ' if table_info.get('temporary') else ''}TABLE {table_name} ({', '.join(columns)})"
     
     if table_info.get('tablespace'):
-        query += f" TABLESPACE {table_info['tablespace']}"
+        query += f" TABLESPACE {_q(table_info['tablespace'])}"
     if table_info.get('partitioning'):
         part_info = table_info['partitioning']
-        query += f" PARTITION BY {part_info['type']}({', '.join(part_info['columns'])}) ("
-        partitions = []
-        for part in part_info['partitions']:
-            if part_info['type'] == 'RANGE':
-                partitions.append(f"PARTITION {part['name']} VALUES LESS THAN ({part['value_less_than']})")
-            elif part_info['type'] == 'LIST':
-                partitions.append(f"PARTITION {part['name']} VALUES ({', '.join(part['values'])})")
-            elif part_info['type'] == 'HASH':
-                partitions.append(f"PARTITION {part['name']}")
-        query += ', '.join(partitions) + ")"
+        query += f" PARTITION BY {part_info['type']}({', '.join(map(_q, part_info['columns']))}) ("
+        query += ', '.join(map(_PART_BUILDERS[part_info['type']], part_info['partitions'])) + ")"
     if table_info.get('compress'):
         query += " COMPRESS"
     if table_info.get('parallel'):
@@ -332,31 +425,113 @@ def create_table(cursor, table_info):
     if table_info.get('row_movement'):
         query += " ENABLE ROW MOVEMENT"
     
-    cursor.execute(query)
+    statements.append(query)
     
     for col in table_info['columns']:
         if col.get('comment'):
-            cursor.execute(f"COMMENT ON COLUMN {table_info['name']}.{col['name']} IS '{col['comment']}'")
+            statements.append(f"COMMENT ON COLUMN {table_name}.{_q(col['name'])} IS '{col['comment']}'")
     
     if table_info.get('comment'):
-        cursor.execute(f"COMMENT ON TABLE {table_info['name']} IS '{table_info['comment']}'")
+        statements.append(f"COMMENT ON TABLE {table_name} IS '{table_info['comment']}'")
+
+    return statements
+
+def create_table(cursor, table_info):
+    execute_statements(cursor, plan_create(table_info))
+    invalidate_state(cursor, table_info['table_name'])
 
 def drop_table(cursor, table_name):
-    cursor.execute(f"DROP TABLE {table_name} PURGE")
+    cursor.execute(f"DROP TABLE {_q(table_name)} PURGE")
+    invalidate_state(cursor, table_name)
 
-def table_exists(cursor, table_name):
-    query = "SELECT table_name FROM user_tables WHERE table_name = :name"
-    cursor.execute(query, name=table_name.upper())
-    return cursor.fetchone() is not None
+# The optimizer handles the data dictionary views poorly, so these queries
+# pin the 11.2.0.4 optimizer behaviour
+_TABLE_EXISTS_QUERY = "SELECT /*+ OPTIMIZER_FEATURES_ENABLE('11.2.0.4') */ table_name FROM user_tables WHERE table_name = :name"
 
-def get_existing_columns(cursor, table_name):
-    query = """
-    SELECT column_name, data_type, data_length, nullable, data_precision, data_scale, data_default, comments
+_COLUMNS_QUERY = """
+    SELECT /*+ OPTIMIZER_FEATURES_ENABLE('11.2.0.4') */ column_name, data_type, data_length, nullable, data_precision, data_scale, data_default, comments
     FROM user_tab_columns
     LEFT JOIN user_col_comments USING (table_name, column_name)
     WHERE table_name = :name
     """
-    cursor.execute(query, name=table_name.upper())
+
+_CONSTRAINTS_QUERY = """
+    SELECT /*+ OPTIMIZER_FEATURES_ENABLE('11.2.0.4') */ c.constraint_name, c.constraint_type, cc.column_name, c.search_condition,
+           c.r_constraint_name, c.generated, c.index_name, r.table_name, rc.column_name, c.delete_rule
+    FROM user_constraints c
+    JOIN user_cons_columns cc ON cc.constraint_name = c.constraint_name AND cc.table_name = c.table_name
+    LEFT JOIN all_constraints r ON r.owner = c.r_owner AND r.constraint_name = c.r_constraint_name
+    LEFT JOIN all_cons_columns rc ON rc.owner = c.r_owner AND rc.constraint_name = c.r_constraint_name AND rc.position = cc.position
+    WHERE c.table_name = :name
+    ORDER BY c.constraint_name, cc.position
+    """
+
+_INDEXES_QUERY = """
+    SELECT /*+ OPTIMIZER_FEATURES_ENABLE('11.2.0.4') */ index_name, index_type, uniqueness, column_name
+    FROM user_indexes
+    JOIN user_ind_columns USING (index_name, table_name)
+    WHERE table_name = :name
+    """
+
+_PROPERTIES_QUERY = """
+    SELECT /*+ OPTIMIZER_FEATURES_ENABLE('11.2.0.4') */ tablespace_name, compression, TRIM(degree), row_movement, comments
+    FROM user_tables
+    LEFT JOIN user_tab_comments USING (table_name)
+    WHERE table_name = :name
+    """
+
+# data_default and search_condition are LONG columns, which rules out a
+# single UNION ALL, so the three queries come back as REF CURSORs instead
+_EXISTING_STATE_BLOCK = f"""
+BEGIN
+    OPEN :columns FOR {_COLUMNS_QUERY};
+    OPEN :constraints FOR {_CONSTRAINTS_QUERY};
+    OPEN :indexes FOR {_INDEXES_QUERY};
+    OPEN :properties FOR {_PROPERTIES_QUERY};
+END;
+"""
+
+def table_exists(cursor, table_name):
+    cursor.execute(_TABLE_EXISTS_QUERY, name=table_name.upper())
+    return cursor.fetchone() is not None
+
+def metadata_cursor(connection):
+    """Cursor for dictionary rows, sized so a wide table arrives in one fetch."""
+    cursor = connection.cursor()
+    cursor.arraysize = 1000
+    cursor.prefetchrows = 1001
+    return cursor
+
+def get_existing_state(cursor, table_name):
+    """Fetch existing columns, constraints, indexes and table properties with one round trip."""
+    # Cursors bound as REF CURSOR out binds keep their prefetch settings
+    columns, constraints, indexes, properties = (metadata_cursor(cursor.connection) for _ in range(4))
+    cursor.execute(_EXISTING_STATE_BLOCK, columns=columns, constraints=constraints, indexes=indexes,
+                   properties=properties, name=table_name.upper())
+    return (columns_from_rows(columns.fetchall()),
+            constraints_from_rows(constraints.fetchall()),
+            indexes_from_rows(indexes.fetchall()),
+            properties_from_rows(properties.fetchall()))
+
+def _state_key(cursor, table_name):
+    connection = cursor.connection
+    return (connection.dsn, connection.username, table_name.upper())
+
+def get_cached_state(cursor, table_name):
+    """get_existing_state, reusing the result for a table this process has already looked at."""
+    key = _state_key(cursor, table_name)
+    state = _STATE_CACHE.get(key)
+    if state is None:
+        state = get_existing_state(cursor, table_name)
+        if len(_STATE_CACHE) >= _STATE_CACHE_SIZE:
+            del _STATE_CACHE[next(iter(_STATE_CACHE))]
+        _STATE_CACHE[key] = state
+    return state
+
+def invalidate_state(cursor, table_name):
+    _STATE_CACHE.pop(_state_key(cursor, table_name), None)
+
+def columns_from_rows(rows):
     return {row[0]: {
         'type': f"{row[1]}({row[2]})" if row[1] in ('VARCHAR2', 'CHAR') else (
             f"{row[1]}({row[4]},{row[5]})" if row[1] == 'NUMBER' and row[4] is not None else row[1]
@@ -364,33 +539,32 @@ def get_existing_columns(cursor, table_name):
         'nullable': row[3] == 'Y',
         'default': row[6],
         'comment': row[7]
-    } for row in cursor.fetchall()}
+    } for row in rows}
+
+def constraints_from_rows(rows):
+    constraints = {}
+    for row in rows:
+        if row[0] not in constraints:
+            constraints[row[0]] = {
+                'type': 'PRIMARY KEY' if row[1] == 'P' else ('UNIQUE' if row[1] == 'U' else ('CHECK' if row[1] == 'C' else 'FOREIGN KEY')),
+                'column': row[2],
+                'columns': [],
+                'condition': row[3],
+                'reference': row[4],
+                'generated': row[5] == 'GENERATED NAME',
+                'index': row[6],
+                'reference_table': row[7],
+                'reference_columns': [],
+                'delete_rule': row[9]
+            }
+        constraints[row[0]]['columns'].append(row[2])
+        if row[8] is not None:
+            constraints[row[0]]['reference_columns'].append(row[8])
+    return constraints
 
-def get_existing_constraints(cursor, table_name):
-    query = """
-    SELECT constraint_name, constraint_type, column_name, search_condition, r_constraint_name
-    FROM user_constraints
-    JOIN user_cons_columns USING (constraint_name, table_name)
-    WHERE table_name = :name
-    """
-    cursor.execute(query, name=table_name.upper())
-    return {row[0]: {
-        'type': 'PRIMARY KEY' if row[1] == 'P' else ('UNIQUE' if row[1] == 'U' else ('CHECK' if row[1] == 'C' else 'FOREIGN KEY')),
-        'column': row[2],
-        'condition': row[3],
-        'reference': row[4]
-    } for row in cursor.fetchall()}
-
-def get_existing_indexes(cursor, table_name):
-    query = """
-    SELECT index_name, index_type, uniqueness, column_name
-    FROM user_indexes
-    JOIN user_ind_columns USING (index_name, table_name)
-    WHERE table_name = :name
-    """
-    cursor.execute(query, name=table_name.upper())
+def indexes_from_rows(rows):
     indexes = {}
-    for row in cursor.fetchall():
+    for row in rows:
         if row[0] not in indexes:
             indexes[row[0]] = {
                 'type': 'BITMAP' if row[1] == 'BITMAP' else 'BTREE',
@@ -400,122 +574,186 @@ def get_existing_indexes(cursor, table_name):
         indexes[row[0]]['columns'].append(row[3])
     return indexes
 
-def modify_table(cursor, table_name, desired_state):
-    existing_columns = get_existing_columns(cursor, table_name)
-    existing_constraints = get_existing_constraints(cursor, table_name)
-    existing_indexes = get_existing_indexes(cursor, table_name)
+def normalized(value):
+    """Dictionary text for comparison: data_default comes back with trailing whitespace, NULL as None."""
+    return (value or '').strip()
+
+def normalized_type(data_type):
+    """Column type as columns_from_rows reports it: upper case, no blanks, NUMBER(p) as NUMBER(p,0)."""
+    data_type = re.sub(r'\s+', '', data_type).upper()
+    return re.sub(r'^NUMBER\((\d+)\)$', r'NUMBER(\1,0)', data_type)
+
+def delete_rule(on_delete):
+    """on_delete as user_constraints.delete_rule reports it, Oracle only has CASCADE and SET NULL clauses."""
+    return on_delete if on_delete in ('CASCADE', 'SET NULL') else 'NO ACTION'
+
+def properties_from_rows(rows):
+    if not rows:
+        return {}
+    row = rows[0]
+    return {
+        'tablespace': row[0],
+        'compress': row[1] == 'ENABLED',
+        'parallel': row[2],
+        'row_movement': row[3] == 'ENABLED',
+        'comment': row[4]
+    }
+
+def plan_changes(table_name, existing_state, desired_state):
+    """Return the DDL that turns the existing table state into the desired one, without running it."""
+    table_name = _q(table_name)
+    existing_columns, existing_constraints, existing_indexes, existing_properties = existing_state
+    statements = []
+    desired_col_names = {_q(col['name']) for col in desired_state['columns']}
+    desired_idx_names = {_q(idx['name']) for idx in desired_state.get('indexes') or []}
     
     # Modify columns
     for col in desired_state['columns']:
-        if col['name'] not in existing_columns:
-            query = f"ALTER TABLE {table_name} ADD {col['name']} {col['type']}"
-            if not col.get('nullable', True):
-                query += " NOT NULL"
+        name = _q(col['name'])
+        if name not in existing_columns:
+            query = f"ALTER TABLE {table_name} ADD {name} {col['type']}"
             if col.get('default'):
                 query += f" DEFAULT {col['default']}"
-            cursor.execute(query)
+            if not col.get('nullable', True):
+                query += " NOT NULL"
+            statements.append(query)
         else:
-            existing_col = existing_columns[col['name']]
-            if existing_col['type'] != col['type'] or existing_col['nullable'] != col.get('nullable', True):
-                nullable_str = "NULL" if col.get('nullable', True) else "NOT NULL"
-                cursor.execute(f"ALTER TABLE {table_name} MODIFY {col['name']} {col['type']} {nullable_str}")
-            if existing_col['default'] != col.get('default'):
+            existing_col = existing_columns[name]
+            # Primary key columns are NOT NULL whatever the nullable option says
+            nullable = col.get('nullable', True) and not col.get('primary_key')
+            modify = []
+            if normalized_type(existing_col['type']) != normalized_type(col['type']):
+                modify.append(col['type'])
+            # Oracle rejects NULL or NOT NULL for a column that already is
+            if existing_col['nullable'] != nullable:
+                modify.append("NULL" if nullable else "NOT NULL")
+            if modify:
+                statements.append(f"ALTER TABLE {table_name} MODIFY {name} {' '.join(modify)}")
+            if normalized(existing_col['default']) != normalized(col.get('default')):
                 if col.get('default'):
-                    cursor.execute(f"ALTER TABLE {table_name} MODIFY {col['name']} DEFAULT {col['default']}")
+                    statements.append(f"ALTER TABLE {table_name} MODIFY {name} DEFAULT {col['default']}")
                 else:
-                    cursor.execute(f"ALTER TABLE {table_name} MODIFY {col['name']} DEFAULT NULL")
-            if existing_col['comment'] != col.get('comment'):
-                cursor.execute(f"COMMENT ON COLUMN {table_name}.{col['name']} IS '{col.get('comment', '')}'")
+                    statements.append(f"ALTER TABLE {table_name} MODIFY {name} DEFAULT NULL")
+            if normalized(existing_col['comment']) != normalized(col.get('comment')):
+                statements.append(f"COMMENT ON COLUMN {table_name}.{name} IS '{col.get('comment') or ''}'")
     
-    # Remove columns that are not in the desired state
-    for col_name in existing_columns:
-        if col_name not in [col['name'] for col in desired_state['columns']]:
-            cursor.execute(f"ALTER TABLE {table_name} DROP COLUMN {col_name}")
+    # Remove columns that are not in the desired state, in one statement so the
+    # table is rewritten once rather than once per column
+    dropped_columns = [col_name for col_name in existing_columns if col_name not in desired_col_names]
+    if dropped_columns:
+        statements.append(f"ALTER TABLE {table_name} DROP ({', '.join(dropped_columns)})")
 
     # Manage constraints
-    desired_constraints = {f"pk_{table_name}": {'type': 'PRIMARY KEY', 'column': next((col['name'] for col in desired_state['columns'] if col.get('primary_key')), None)}}
+    desired_constraints = {f"PK_{table_name}": {'type': 'PRIMARY KEY', 'column': next((_q(col['name']) for col in desired_state['columns'] if col.get('primary_key')), None)}}
     for col in desired_state['columns']:
         if col.get('unique'):
-            desired_constraints[f"uk_{table_name}_{col['name']}"] = {'type': 'UNIQUE', 'column': col['name']}
+            desired_constraints[f"UK_{table_name}_{_q(col['name'])}"] = {'type': 'UNIQUE', 'column': _q(col['name'])}
         if col.get('check'):
-            desired_constraints[f"ck_{table_name}_{col['name']}"] = {'type': 'CHECK', 'column': col['name'], 'condition': col['check']}
-
-    for constraint in existing_constraints.values():
-        if constraint['type'] in ['PRIMARY KEY', 'UNIQUE', 'CHECK']:
-            if constraint['column'] not in [col['name'] for col in desired_state['columns']] or \
-               constraint['type'] not in [c['type'] for c in desired_constraints.values()] or \
-               (constraint['type'] == 'CHECK' and constraint['condition'] != next((c['condition'] for c in desired_constraints.values() if c['type'] == 'CHECK' and c['column'] == constraint['column']), None)):
-                cursor.execute(f"ALTER TABLE {table_name} DROP CONSTRAINT {constraint['name']}")
+            desired_constraints[f"CK_{table_name}_{_q(col['name'])}"] = {'type': 'CHECK', 'column': _q(col['name']), 'condition': col['check']}
+
+    desired_constraint_types = {c['type'] for c in desired_constraints.values()}
+    desired_checks = {c['column']: c['condition'] for c in desired_constraints.values() if c['type'] == 'CHECK'}
+    for constraint_name, constraint in existing_constraints.items():
+        # NOT NULL shows up as a system named CHECK, it is managed through the column's nullable
+        if constraint['type'] == 'CHECK' and constraint['generated'] and \
+           normalized(constraint['condition']) == f'"{constraint["column"]}" IS NOT NULL':
+            continue
+        if constraint['type'] in ('PRIMARY KEY', 'UNIQUE', 'CHECK'):
+            if constraint['column'] not in desired_col_names or \
+               constraint['type'] not in desired_constraint_types or \
+               (constraint['type'] == 'CHECK' and constraint['condition'] != desired_checks.get(constraint['column'])):
+                statements.append(f"ALTER TABLE {table_name} DROP CONSTRAINT {constraint_name}")
 
     for constraint_name, constraint in desired_constraints.items():
         if constraint['column'] and constraint_name not in existing_constraints:
             if constraint['type'] == 'PRIMARY KEY':
-                cursor.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} PRIMARY KEY ({constraint['column']})")
+                statements.append(f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} PRIMARY KEY ({constraint['column']})")
             elif constraint['type'] == 'UNIQUE':
-                cursor.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} UNIQUE ({constraint['column']})")
+                statements.append(f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} UNIQUE ({constraint['column']})")
             elif constraint['type'] == 'CHECK':
-                cursor.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} CHECK ({constraint['condition']})")
+                statements.append(f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} CHECK ({constraint['condition']})")
 
     # Manage indexes
-    for index in desired_state.get('indexes', []):
-        if index['name'] not in existing_indexes:
+    for index in desired_state.get('indexes') or []:
+        index_name = _q(index['name'])
+        index_columns = [_q(column) for column in index['columns']]
+        if index_name not in existing_indexes:
             unique = "UNIQUE " if index.get('unique') else ""
             index_type = f"BITMAP " if index.get('type') == 'BITMAP' else ""
-            columns = ", ".join(index['columns'])
-            cursor.execute(f"CREATE {unique}{index_type}INDEX {index['name']} ON {table_name} ({columns})")
+            columns = ", ".join(index_columns)
+            statements.append(f"CREATE {unique}{index_type}INDEX {index_name} ON {table_name} ({columns})")
         else:
-            existing_index = existing_indexes[index['name']]
+            existing_index = existing_indexes[index_name]
             if existing_index['unique'] != index.get('unique', False) or \
                existing_index['type'] != index.get('type', 'BTREE') or \
-               existing_index['columns'] != index['columns']:
-                cursor.execute(f"DROP INDEX {index['name']}")
+               existing_index['columns'] != index_columns:
+                statements.append(f"DROP INDEX {index_name}")
                 unique = "UNIQUE " if index.get('unique') else ""
                 index_type = f"BITMAP " if index.get('type') == 'BITMAP' else ""
-                columns = ", ".join(index['columns'])
-                cursor.execute(f"CREATE {unique}{index_type}INDEX {index['name']} ON {table_name} ({columns})")
+                columns = ", ".join(index_columns)
+                statements.append(f"CREATE {unique}{index_type}INDEX {index_name} ON {table_name} ({columns})")
 
+    # Indexes backing a primary key or unique constraint go with the constraint
+    constraint_indexes = {constraint['index'] for constraint in existing_constraints.values()
+                          if constraint['type'] in ('PRIMARY KEY', 'UNIQUE')}
     for index_name in existing_indexes:
-        if index_name not in [idx['name'] for idx in desired_state.get('indexes', [])]:
-            cursor.execute(f"DROP INDEX {index_name}")
+        if index_name not in desired_idx_names and index_name not in constraint_indexes:
+            statements.append(f"DROP INDEX {index_name}")
 
     # Manage foreign keys
-    for fk in desired_state.get('foreign_keys', []):
-        fk_name = fk['name']
-        if fk_name not in existing_constraints:
-            columns = ", ".join(fk['columns'])
-            ref_columns = ", ".join(fk['reference_columns'])
-            on_delete = f" ON DELETE {fk['on_delete']}" if fk.get('on_delete') else ""
-            cursor.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {fk_name} FOREIGN KEY ({columns}) "
-                           f"REFERENCES {fk['reference_table']} ({ref_columns}){on_delete}")
-        else:
-            # For simplicity, we're dropping and recreating foreign keys if they exist
-            # A more sophisticated approach would compare the existing and desired states
-            cursor.execute(f"ALTER TABLE {table_name} DROP CONSTRAINT {fk_name}")
-            columns = ", ".join(fk['columns'])
-            ref_columns = ", ".join(fk['reference_columns'])
-            on_delete = f" ON DELETE {fk['on_delete']}" if fk.get('on_delete') else ""
-            cursor.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {fk_name} FOREIGN KEY ({columns}) "
-                           f"REFERENCES {fk['reference_table']} ({ref_columns}){on_delete}")
-
-    # Update table properties
-    if desired_state.get('tablespace'):
-        cursor.execute(f"ALTER TABLE {table_name} MOVE TABLESPACE {desired_state['tablespace']}")
-    if desired_state.get('parallel'):
-        cursor.execute(f"ALTER TABLE {table_name} PARALLEL {desired_state['parallel']}")
-    if desired_state.get('compress') is not None:
-        cursor.execute(f"ALTER TABLE {table_name} {'COMPRESS' if desired_state['compress'] else 'NOCOMPRESS'}")
-    if desired_state.get('row_movement') is not None:
-        cursor.execute(f"ALTER TABLE {table_name} {'ENABLE' if desired_state['row_movement'] else 'DISABLE'} ROW MOVEMENT")
+    for fk in desired_state.get('foreign_keys') or []:
+        fk_name = _q(fk['name'])
+        fk_columns = [_q(column) for column in fk['columns']]
+        ref_columns = [_q(column) for column in fk['reference_columns']]
+        rule = delete_rule(fk.get('on_delete'))
+        existing_fk = existing_constraints.get(fk_name)
+        if existing_fk is not None:
+            # Re-create the key only when it no longer matches
+            if existing_fk['columns'] == fk_columns and existing_fk['reference_columns'] == ref_columns and \
+               existing_fk['reference_table'] == _q(fk['reference_table']) and existing_fk['delete_rule'] == rule:
+                continue
+            statements.append(f"ALTER TABLE {table_name} DROP CONSTRAINT {fk_name}")
+        on_delete = f" ON DELETE {rule}" if rule != 'NO ACTION' else ""
+        statements.append(f"ALTER TABLE {table_name} ADD CONSTRAINT {fk_name} FOREIGN KEY ({', '.join(fk_columns)}) "
+                          f"REFERENCES {_q(fk['reference_table'])} ({', '.join(ref_columns)}){on_delete}")
+
+    # Update table properties, MOVE rewrites the whole table so only when the tablespace differs
+    if desired_state.get('tablespace') and _q(desired_state['tablespace']) != existing_properties.get('tablespace'):
+        statements.append(f"ALTER TABLE {table_name} MOVE TABLESPACE {_q(desired_state['tablespace'])}")
+    if desired_state.get('parallel') and str(desired_state['parallel']) != existing_properties.get('parallel'):
+        statements.append(f"ALTER TABLE {table_name} PARALLEL {desired_state['parallel']}")
+    if desired_state.get('compress') is not None and desired_state['compress'] != existing_properties.get('compress'):
+        statements.append(f"ALTER TABLE {table_name} {'COMPRESS' if desired_state['compress'] else 'NOCOMPRESS'}")
+    if desired_state.get('row_movement') is not None and \
+       desired_state['row_movement'] != existing_properties.get('row_movement'):
+        statements.append(f"ALTER TABLE {table_name} {'ENABLE' if desired_state['row_movement'] else 'DISABLE'} ROW MOVEMENT")
     
     # Update table comment
-    if desired_state.get('comment'):
-        cursor.execute(f"COMMENT ON TABLE {table_name} IS '{desired_state['comment']}'")
+    if desired_state.get('comment') and normalized(desired_state['comment']) != normalized(existing_properties.get('comment')):
+        statements.append(f"COMMENT ON TABLE {table_name} IS '{desired_state['comment']}'")
 
     # Note: Modifying partitioning scheme is complex and often requires recreating the table
     # This implementation doesn't handle partition modifications for existing tables
 
-def gather_table_stats(cursor, table_name):
-    cursor.execute(f"BEGIN DBMS_STATS.GATHER_TABLE_STATS(ownname => USER, tabname => '{table_name}'); END;")
+    return statements
+
+def modify_table(cursor, table_name, desired_state):
+    """Apply the planned changes and return them, an empty plan means nothing was done."""
+    statements = plan_changes(table_name, get_cached_state(cursor, table_name), desired_state)
+    # Dropped up front, a batch that fails halfway still leaves the table changed
+    if statements:
+        invalidate_state(cursor, table_name)
+    execute_statements(cursor, statements)
+    return statements
+
+def gather_table_stats(cursor, table_name, degree=None):
+    cursor.execute("""
+    BEGIN
+        DBMS_STATS.GATHER_TABLE_STATS(ownname => USER, tabname => :name,
+                                      estimate_percent => DBMS_STATS.AUTO_SAMPLE_SIZE,
+                                      degree => NVL(:degree, DBMS_STATS.DEFAULT_DEGREE));
+    END;
+    """, name=table_name, degree=degree)
 
 def run_module():
     module_args = dict(
@@ -583,18 +821,21 @@ def run_module():
 
     try:
         dsn = cx_Oracle.makedsn(hostname, port, service_name=service_name)
-        connection = cx_Oracle.connect(user=user, password=password, dsn=dsn)
+        connection = get_pool(user, password, dsn).acquire()
         cursor = connection.cursor()
 
         if state == 'present':
             if not table_exists(cursor, table_name):
-                if not module.check_mode:
+                if module.check_mode:
+                    result['plan'] = plan_create(module.params)
+                else:
                     create_table(cursor, module.params)
                 result['changed'] = True
+            elif module.check_mode:
+                result['plan'] = plan_changes(table_name, get_cached_state(cursor, table_name), module.params)
+                result['changed'] = bool(result['plan'])
             else:
-                if not module.check_mode:
-                    modify_table(cursor, table_name, module.params)
-                result['changed'] = True
+                result['changed'] = bool(modify_table(cursor, table_name, module.params))
         elif state == 'absent':
             if table_exists(cursor, table_name):
                 if not module.check_mode:
@@ -602,20 +843,23 @@ def run_module():
                 result['changed'] = True
         elif state == 'modified':
             if table_exists(cursor, table_name):
-                if not module.check_mode:
-                    modify_table(cursor, table_name, module.params)
-                result['changed'] = True
+                if module.check_mode:
+                    result['plan'] = plan_changes(table_name, get_cached_state(cursor, table_name), module.params)
+                    result['changed'] = bool(result['plan'])
+                else:
+                    result['changed'] = bool(modify_table(cursor, table_name, module.params))
             else:
                 module.fail_json(msg=f"Table {table_name} does not exist", **result)
 
-        if not module.check_mode:
+        if not module.check_mode and result['changed']:
             connection.commit()
-            if module.params['gather_stats']:
-                gather_table_stats(cursor, table_name)
+            # Statistics only go stale when the table was created or altered
+            if module.params['gather_stats'] and state != 'absent':
+                gather_table_stats(cursor, table_name, module.params['parallel'])
 
         result['table'] = module.params
 
-    except cx_Oracle.Error as error:
+    except (cx_Oracle.Error, ValueError) as error:
         module.fail_json(msg=str(error), **result)
 
     finally:
@@ -2,23 +2,62 @@
 
 from ansible.module_utils.basic import AnsibleModule
 import cx_Oracle
+import re
+
+_POOLS = {}
+
+_IDENT = r'(?:[A-Z][A-Z0-9_$#]*|"[^"\r\n]+")'
+# A privilege or role name word, never ON so object grants cannot pass as system privileges
+_WORDS = r'(?!ON\b)[A-Z][A-Z0-9_$#]*(?: (?!ON\b)[A-Z][A-Z0-9_$#]*)*'
+# System privileges and roles, e.g. CREATE SESSION, SELECT ANY TABLE, DBA, "MyRole"
+_PRIVILEGE_RE = re.compile(rf'{_WORDS}|"[^"\r\n]+"', re.I)
+# Object privileges, e.g. SELECT ON hr.employees, UPDATE (salary) ON hr.emp, READ ON DIRECTORY data_dir,
+# which cannot share a GRANT with the above
+_OBJECT_PRIVILEGE = rf'{_WORDS}(?: ?\({_IDENT}(?:, ?{_IDENT})*\))?'
+_OBJECT_PRIVILEGE_RE = re.compile(
+    rf'{_OBJECT_PRIVILEGE}(?:, ?{_OBJECT_PRIVILEGE})* ON '
+    rf'(?:(?:DIRECTORY|USER|EDITION|JAVA SOURCE|JAVA RESOURCE|MINING MODEL) )?{_IDENT}(?:\.{_IDENT})?', re.I)
+_ON_RE = re.compile(r'\sON\s', re.I)
+
+def get_pool(connect_string):
+    """
+    Returns a session pool for a user/password@dsn connect string, creating it on first use.
+    A connect string without user and password, such as /@walletalias, uses external authentication.
+    """
+    user, _, credentials = connect_string.partition('/')
+    if '@' in credentials:
+        password, _, dsn = credentials.rpartition('@')
+    else:
+        password, dsn = credentials, None
+    key = (user, dsn)
+    pool = _POOLS.get(key)
+    if pool is None:
+        if user or password:
+            pool = cx_Oracle.SessionPool(user=user, password=password, dsn=dsn, min=1, max=4, increment=1,
+                                         threaded=False, homogeneous=True)
+        else:
+            # External authentication (wallet or OS) needs a heterogeneous pool
+            pool = cx_Oracle.SessionPool(dsn=dsn, min=1, max=4, increment=1, threaded=False,
+                                         homogeneous=False, externalauth=True)
+        pool.stmtcachesize = 50
+        _POOLS[key] = pool
+    return pool
 
 def connect_to_oracle(module):
     """
-    Establishes a connection to Oracle database using cx_Oracle library.
+    Acquires a connection to Oracle database from the session pool.
     """
     try:
-        connection = cx_Oracle.connect(module.params['connect_string'])
+        connection = get_pool(module.params['connect_string']).acquire()
         return connection
     except cx_Oracle.DatabaseError as e:
         module.fail_json(msg=f"Failed to connect to Oracle: {e}")
 
-def execute_sql_query(module, connection, query, params=None):
+def execute_sql_query(module, cursor, query, params=None):
     """
-    Executes a SQL query on the Oracle database and handles exceptions.
+    Executes a SQL query on the given cursor and handles exceptions.
     """
     try:
-        cursor = connection.cursor()
         if params:
             cursor.execute(query, params)
         else:
@@ -27,6 +66,29 @@ def execute_sql_query(module, connection, query, params=None):
     except cx_Oracle.DatabaseError as e:
         module.fail_json(msg=f"Failed to execute SQL query: {query}. Error: {e}")
 
+def user_exists(module, cursor, username):
+    """
+    Checks whether the user exists, stopping at the first matching row.
+    """
+    query = "SELECT /*+ OPTIMIZER_FEATURES_ENABLE('11.2.0.4') */ 1 FROM dba_users WHERE username = :username AND ROWNUM = 1"
+    execute_sql_query(module, cursor, query, {'username': username.upper()})
+    return cursor.fetchone() is not None
+
+def classify_privileges(privileges):
+    """
+    Splits privileges into system privileges and roles, object privileges and invalid entries.
+    Anything naming an object with ON is an object privilege.
+    """
+    system_privileges, object_privileges, invalid = [], [], []
+    for privilege in privileges:
+        if _ON_RE.search(privilege):
+            kind, pattern = object_privileges, _OBJECT_PRIVILEGE_RE
+        else:
+            kind, pattern = system_privileges, _PRIVILEGE_RE
+        # fullmatch, a $ anchor would still let a trailing newline through
+        (kind if pattern.fullmatch(privilege) else invalid).append(privilege)
+    return system_privileges, object_privileges, invalid
+
 def create_or_update_user(module, connection):
     """
     Creates or updates an Oracle SQL user based on module parameters.
@@ -36,39 +98,43 @@ def create_or_update_user(module, connection):
     state = module.params['state']
     privileges = module.params['privileges']
 
-    if state == 'present':
-        # Check if the user already exists
-        query = "SELECT COUNT(*) FROM dba_users WHERE username = :username"
-        cursor = execute_sql_query(module, connection, query, {'username': username})
-        user_exists = cursor.fetchone()[0]
+    # One cursor for every statement, the rows fetched are single-row lookups at most
+    cursor = connection.cursor()
+    cursor.arraysize = 1
+
+    exists = user_exists(module, cursor, username)
 
-        if user_exists == 0:
+    if state == 'present':
+        if not exists:
             # User does not exist, create it
             query = f"CREATE USER {username} IDENTIFIED BY {password}"
-            execute_sql_query(module, connection, query)
+            execute_sql_query(module, cursor, query)
             module.exit_json(changed=True, msg=f"User '{username}' created successfully")
         else:
             # User exists, update password and privileges if needed
             query = f"ALTER USER {username} IDENTIFIED BY {password}"
-            execute_sql_query(module, connection, query)
+            execute_sql_query(module, cursor, query)
 
             if privileges:
-                for privilege in privileges:
-                    query = f"GRANT {privilege} TO {username}"
-                    execute_sql_query(module, connection, query)
+                privileges = list(dict.fromkeys(privileges))
+                system_privileges, object_privileges, invalid = classify_privileges(privileges)
+                if invalid:
+                    module.fail_json(msg=f"Invalid privileges: {', '.join(invalid)}")
+
+                # One GRANT for all system privileges and roles
+                if system_privileges:
+                    execute_sql_query(module, cursor, f"GRANT {', '.join(system_privileges)} TO {username}")
+                for privilege in object_privileges:
+                    execute_sql_query(module, cursor, f"GRANT {privilege} TO {username}")
 
             module.exit_json(changed=False, msg=f"User '{username}' exists and updated")
 
     elif state == 'absent':
         # Delete the user if it exists
-        query = f"SELECT COUNT(*) FROM dba_users WHERE username = :username"
-        cursor = execute_sql_query(module, connection, query, {'username': username})
-        user_exists = cursor.fetchone()[0]
-
-        if user_exists > 0:
+        if exists:
             # User exists, delete it
             query = f"DROP USER {username} CASCADE"
-            execute_sql_query(module, connection, query)
+            execute_sql_query(module, cursor, query)
             module.exit_json(changed=True, msg=f"User '{username}' deleted successfully")
         else:
             # User does not exist
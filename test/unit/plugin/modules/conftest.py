@@ -0,0 +1,19 @@
+# Copyright: (c) 2024, Andavarapu Sampat Kalyan <sampatkalyana@gmail.com>
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+import sys
+import types
+from unittest.mock import MagicMock
+
+# The unit tests never reach a database, and cx_Oracle needs the Oracle client
+# libraries to build, so a stand-in is installed when it is missing. It has to be
+# in sys.modules before the test files import the oraclesql_* modules.
+try:
+    import cx_Oracle  # noqa: F401
+except ImportError:
+    cx_Oracle = types.ModuleType('cx_Oracle')
+    cx_Oracle.Error = type('Error', (Exception,), {})
+    cx_Oracle.DatabaseError = type('DatabaseError', (cx_Oracle.Error,), {})
+    cx_Oracle.SessionPool = MagicMock(name='cx_Oracle.SessionPool')
+    cx_Oracle.makedsn = MagicMock(name='cx_Oracle.makedsn')
+    sys.modules['cx_Oracle'] = cx_Oracle
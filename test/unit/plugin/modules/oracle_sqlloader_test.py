@@ -0,0 +1,241 @@
+# Copyright: (c) 2024, Andavarapu Sampat Kalyan <sampatkalyana@gmail.com>
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+import json
+import os
+import pytest
+from ansible.module_utils import basic
+from ansible.module_utils._text import to_bytes
+from unittest.mock import patch, MagicMock
+from ansible_collections.andavarapu.oracle_sql.plugins.modules import oracle_sqlloader
+
+def set_module_args(args):
+    """prepare arguments so that they will be picked up during module creation"""
+    args = json.dumps({'ANSIBLE_MODULE_ARGS': args})
+    basic._ANSIBLE_ARGS = to_bytes(args)
+
+class AnsibleExitJson(Exception):
+    """Exception class to be raised by module.exit_json and caught by the test case"""
+    pass
+
+class AnsibleFailJson(Exception):
+    """Exception class to be raised by module.fail_json and caught by the test case"""
+    pass
+
+def exit_json(*args, **kwargs):
+    """function to patch over exit_json; package return data into an exception"""
+    if 'changed' not in kwargs:
+        kwargs['changed'] = False
+    raise AnsibleExitJson(kwargs)
+
+def fail_json(*args, **kwargs):
+    """function to patch over fail_json; package return data into an exception"""
+    kwargs['failed'] = True
+    raise AnsibleFailJson(kwargs)
+
+@pytest.fixture
+def mock_module(monkeypatch):
+    monkeypatch.setattr(basic.AnsibleModule, "exit_json", exit_json)
+    monkeypatch.setattr(basic.AnsibleModule, "fail_json", fail_json)
+
+def make_process(stderr=b'', returncode=0):
+    """build a Popen stand-in usable through subprocess.run"""
+    mock_process = MagicMock()
+    mock_process.__enter__.return_value = mock_process
+    mock_process.communicate.return_value = (None, stderr)
+    mock_process.poll.return_value = returncode
+    mock_process.returncode = returncode
+    return mock_process
+
+@pytest.fixture
+def load_args(tmp_path):
+    control_file = tmp_path / 'control.ctl'
+    data_file = tmp_path / 'data.csv'
+    control_file.write_text('LOAD DATA')
+    data_file.write_text('1,foo')
+    return {
+        'username': 'testuser',
+        'password': 'testpass',
+        'sid': 'ORCL',
+        'host': 'localhost',
+        'port': 1521,
+        'control_file': str(control_file),
+        'data_file': str(data_file),
+        'log_file': str(tmp_path / 'load.log'),
+        'bad_file': str(tmp_path / 'load.bad'),
+    }
+
+@patch('subprocess.Popen')
+def test_sqlloader_runs_once_with_optional_params(mock_popen, mock_module, load_args):
+    load_args.update({
+        'direct': True,
+        'skip': 10,
+        'load': 1000,
+        'silent': 'ERRORS',
+        'errors': 50,
+        'rows': 500,
+        'trim': 'BOTH',
+    })
+    set_module_args(load_args)
+
+    mock_popen.return_value = make_process()
+
+    with pytest.raises(AnsibleExitJson) as result:
+        oracle_sqlloader.main()
+
+    assert mock_popen.call_count == 1
+    assert 'skip=10' in result.value.args[0]['cmd']
+    assert 'trim=BOTH' in result.value.args[0]['cmd']
+    assert result.value.args[0]['changed'] == True
+    assert result.value.args[0]['stdout'] == ''
+
+@patch('subprocess.Popen')
+def test_sqlloader_masks_password_in_cmd(mock_popen, mock_module, load_args):
+    set_module_args(load_args)
+
+    mock_popen.return_value = make_process()
+
+    with pytest.raises(AnsibleExitJson) as result:
+        oracle_sqlloader.main()
+
+    assert 'userid=testuser/****@localhost:1521/ORCL' in result.value.args[0]['cmd']
+    assert 'testpass' not in result.value.args[0]['cmd']
+    assert 'userid=testuser/testpass@localhost:1521/ORCL' in mock_popen.call_args[0][0]
+
+@patch('subprocess.Popen')
+def test_sqlloader_passes_long_command_through_parfile(mock_popen, mock_module, load_args):
+    load_args.update({
+        'skip': 10,
+        'scratch_dir': '/path with spaces/scratch',
+        'trim': 'BOTH',
+    })
+    set_module_args(load_args)
+
+    parfiles = []
+
+    def popen(cmd, **kwargs):
+        parfile = cmd[-1].split('=', 1)[1]
+        with open(parfile) as f:
+            parfiles.append((parfile, f.read()))
+        return make_process()
+
+    mock_popen.side_effect = popen
+
+    with pytest.raises(AnsibleExitJson):
+        oracle_sqlloader.main()
+
+    cmd = mock_popen.call_args[0][0]
+    assert len(cmd) == 3
+    assert cmd[0] == 'sqlldr'
+    assert cmd[1].startswith('userid=')
+    parfile, content = parfiles[0]
+    assert 'skip=10\n' in content
+    assert 'scratch_dir="/path with spaces/scratch"\n' in content
+    assert f"control={load_args['control_file']}\n" in content
+    assert not os.path.exists(parfile)
+
+@patch('subprocess.Popen')
+def test_sqlloader_check_mode(mock_popen, mock_module, load_args):
+    load_args.update({
+        'connection_string': 'testuser/testpass@ORCL',
+        'skip': 10,
+        '_ansible_check_mode': True,
+    })
+    set_module_args(load_args)
+
+    with pytest.raises(AnsibleExitJson) as result:
+        oracle_sqlloader.main()
+
+    assert mock_popen.call_count == 0
+    assert result.value.args[0]['changed'] == True
+    assert result.value.args[0]['cmd'] == ''
+
+@patch('subprocess.Popen')
+def test_sqlloader_failure_reports_log_tail(mock_popen, mock_module, load_args):
+    with open(load_args['log_file'], 'w') as f:
+        f.write('SQL*Loader-601: For INSERT option, table must be empty.\n')
+    set_module_args(load_args)
+
+    mock_popen.return_value = make_process(returncode=1)
+
+    with pytest.raises(AnsibleFailJson) as result:
+        oracle_sqlloader.main()
+
+    assert result.value.args[0]['rc'] == 1
+    assert 'SQL*Loader-601' in result.value.args[0]['stderr']
+
+@patch('subprocess.Popen')
+def test_sqlloader_batch(mock_popen, mock_module, load_args, tmp_path):
+    batch = []
+    for name, loaded in (('emp', 10), ('dept', 4)):
+        log_file = tmp_path / f'{name}.log'
+        log_file.write_text(f'  {loaded} Rows successfully loaded.\n  1 Rows not loaded due to data errors.\n')
+        batch.append({
+            'control_file': str(tmp_path / f'{name}.ctl'),
+            'data_file': str(tmp_path / f'{name}.csv'),
+            'log_file': str(log_file),
+            'bad_file': str(tmp_path / f'{name}.bad'),
+        })
+    for file_param in ('control_file', 'data_file', 'log_file', 'bad_file'):
+        del load_args[file_param]
+    load_args['batch'] = batch
+    set_module_args(load_args)
+
+    mock_popen.return_value = make_process()
+
+    with pytest.raises(AnsibleExitJson) as result:
+        oracle_sqlloader.main()
+
+    assert mock_popen.call_count == 2
+    assert result.value.args[0]['records_loaded'] == 14
+    assert result.value.args[0]['records_rejected'] == 2
+    assert [r['records_loaded'] for r in result.value.args[0]['results']] == [10, 4]
+    assert 'control=' + batch[1]['control_file'] in result.value.args[0]['results'][1]['cmd']
+
+@patch('subprocess.Popen')
+def test_sqlloader_batch_failure_reports_completed_loads(mock_popen, mock_module, load_args, tmp_path):
+    batch = []
+    for name in ('emp', 'dept', 'bonus'):
+        log_file = tmp_path / f'{name}.log'
+        log_file.write_text('  10 Rows successfully loaded.\n')
+        batch.append({
+            'control_file': str(tmp_path / f'{name}.ctl'),
+            'data_file': str(tmp_path / f'{name}.csv'),
+            'log_file': str(log_file),
+            'bad_file': str(tmp_path / f'{name}.bad'),
+        })
+    for file_param in ('control_file', 'data_file', 'log_file', 'bad_file'):
+        del load_args[file_param]
+    load_args['batch'] = batch
+    set_module_args(load_args)
+
+    mock_popen.side_effect = [make_process(), make_process(returncode=1)]
+
+    with pytest.raises(AnsibleFailJson) as result:
+        oracle_sqlloader.main()
+
+    assert mock_popen.call_count == 2
+    assert result.value.args[0]['changed'] == True
+    assert [r['records_loaded'] for r in result.value.args[0]['results']] == [10]
+    assert 'control=' + batch[1]['control_file'] in result.value.args[0]['cmd']
+
+def test_parse_log_file(tmp_path):
+    log_file = tmp_path / 'load.log'
+    log_file.write_text(
+        'Table EMP:\n'
+        '  998 Rows successfully loaded.\n'
+        '  2 Rows not loaded due to data errors.\n'
+    )
+
+    assert oracle_sqlloader.parse_log_file(str(log_file)) == (998, 2)
+
+def test_parse_log_file_widens_tail_window(tmp_path):
+    log_file = tmp_path / 'load.log'
+    log_file.write_text(
+        'Record 1: Rejected - Error on table EMP.\n' * 4000 +
+        '  12345 Rows successfully loaded.\n'
+        '  4000 Rows not loaded due to data errors.\n' +
+        'Elapsed time was:     00:00:01.00\n' * 3000
+    )
+
+    assert oracle_sqlloader.parse_log_file(str(log_file)) == (12345, 4000)
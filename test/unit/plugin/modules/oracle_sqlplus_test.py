@@ -1,23 +1,36 @@
 # Copyright: (c) 2024, Andavarapu Sampat Kalyan <sampatkalyana@gmail.com>
 # Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
 
+import io
+import json
+import subprocess
+import sys
 import pytest
+from types import SimpleNamespace
 from ansible.module_utils import basic
 from ansible.module_utils._text import to_bytes
 #import ansible.module_utils.oracle_sqlplus as oracle_sqlplus
 from unittest.mock import patch, MagicMock
 from ansible_collections.andavarapu.oracle_sql.plugins.modules import oracle_sqlplus
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def set_module_args(args):
     """prepare arguments so that they will be picked up during module creation"""
-    args = json.dumps({'ANSIBLE_MODULE_ARGS': args})
-    basic._ANSIBLE_ARGS = to_bytes(args)
+    args = {'ANSIBLE_MODULE_ARGS': args}
+    # orjson serializes straight to UTF-8 bytes
+    basic._ANSIBLE_ARGS = orjson.dumps(args) if orjson else to_bytes(json.dumps(args))
 
-class AnsibleExitJson(Exception):
+# The real exit_json/fail_json end with sys.exit(), so these derive from
+# SystemExit to get past the module's own `except Exception` handler
+class AnsibleExitJson(SystemExit):
     """Exception class to be raised by module.exit_json and caught by the test case"""
     pass
 
-class AnsibleFailJson(Exception):
+class AnsibleFailJson(SystemExit):
     """Exception class to be raised by module.fail_json and caught by the test case"""
     pass
 
@@ -32,161 +45,301 @@ def fail_json(*args, **kwargs):
     kwargs['failed'] = True
     raise AnsibleFailJson(kwargs)
 
+def make_process(stdout, returncode=0):
+    """build a Popen stand-in whose output streams can be read line by line"""
+    return SimpleNamespace(stdin=io.BytesIO(), stdout=io.BytesIO(stdout), returncode=returncode,
+                           wait=lambda: returncode)
+
+@pytest.fixture(scope="module", autouse=True)
+def mock_module():
+    """patch exit_json and fail_json once for every test in this file"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(basic.AnsibleModule, "exit_json", exit_json)
+        mp.setattr(basic.AnsibleModule, "fail_json", fail_json)
+        yield
+
 @pytest.fixture
-def mock_module(monkeypatch):
-    monkeypatch.setattr(basic, "AnsibleModule", MagicMock())
-    monkeypatch.setattr(basic.AnsibleModule, "exit_json", exit_json)
-    monkeypatch.setattr(basic.AnsibleModule, "fail_json", fail_json)
+def mock_popen():
+    with patch.object(oracle_sqlplus, 'check_sqlplus_installed'), patch('subprocess.Popen') as mock_popen:
+        yield mock_popen
 
-def test_module_fail_when_required_args_missing(mock_module):
+@pytest.fixture
+def sql_script(tmp_path):
+    script = tmp_path / 'test.sql'
+    script.write_text('SELECT * FROM test_table;')
+    return str(script)
+
+def test_module_fail_when_required_args_missing():
     with pytest.raises(AnsibleFailJson) as ex:
         set_module_args({})
         oracle_sqlplus.main()
     assert "Either 'script', 'raw_sql', or 'loop' must be specified" in str(ex.value)
 
-@patch('subprocess.Popen')
-def test_execute_sqlplus_script(mock_popen, mock_module):
-    set_module_args({
-        'script': '/path/to/test.sql',
-        'username': 'testuser',
-        'password': 'testpass',
-        'database': 'testdb'
-    })
-    
-    mock_process = MagicMock()
-    mock_process.communicate.return_value = (b'SQL execution successful', b'')
-    mock_process.returncode = 0
-    mock_popen.return_value = mock_process
+_CONNECTION = {'username': 'testuser', 'password': 'testpass', 'database': 'testdb'}
 
-    with pytest.raises(AnsibleExitJson) as result:
+@pytest.mark.parametrize('args,stdout,returncode,exception,expected', [
+    (dict(_CONNECTION, script='test.sql'),
+     b'SQL execution successful', 0, AnsibleExitJson, ['SQL execution successful']),
+    (dict(_CONNECTION, raw_sql='SELECT * FROM test_table'),
+     b'1 row selected', 0, AnsibleExitJson, ['1 row selected']),
+    (dict(_CONNECTION, script='test.sql', substitution_variables=['var1', 'var2']),
+     b'Substitution variables applied', 0, AnsibleExitJson, ['Substitution variables applied']),
+    (dict(_CONNECTION, raw_sql='SELECT * FROM test_table WHERE id = :id', bind_variables={'id': '1'}),
+     b'Bind variables applied', 0, AnsibleExitJson, ['Bind variables applied']),
+    ({'script': 'test.sql', 'sysdba': True},
+     b'Connected as SYSDBA', 0, AnsibleExitJson, ['Connected as SYSDBA']),
+    (dict(_CONNECTION, script='test.sql'),
+     b'ORA-12345: Test error', 1, AnsibleFailJson, ['SQL*Plus execution failed', 'ORA-12345: Test error']),
+], ids=['script', 'raw_sql', 'substitution_variables', 'bind_variables', 'sysdba', 'failure'])
+def test_execute_sqlplus(mock_popen, sql_script, args, stdout, returncode, exception, expected):
+    if 'script' in args:
+        args = dict(args, script=sql_script)
+    set_module_args(args)
+
+    mock_popen.return_value = make_process(stdout, returncode)
+
+    with pytest.raises(exception) as result:
         oracle_sqlplus.main()
-    
-    assert result.value.args[0]['changed'] == True
-    assert 'SQL execution successful' in result.value.args[0]['sqlplus_output']
 
-@patch('subprocess.Popen')
-def test_execute_sqlplus_raw_sql(mock_popen, mock_module):
+    if exception is AnsibleExitJson:
+        assert result.value.args[0]['changed'] == True
+        output = result.value.args[0]['sqlplus_output']
+    else:
+        output = str(result.value)
+    for text in expected:
+        assert text in output
+
+@patch.object(oracle_sqlplus.SqlplusSession, 'run')
+def test_execute_sqlplus_loop(mock_run, mock_popen, sql_script):
     set_module_args({
-        'raw_sql': 'SELECT * FROM test_table',
+        'loop': [
+            {'script': sql_script},
+            {'raw_sql': 'SELECT * FROM table2'}
+        ],
         'username': 'testuser',
         'password': 'testpass',
         'database': 'testdb'
     })
     
-    mock_process = MagicMock()
-    mock_process.communicate.return_value = (b'1 row selected', b'')
-    mock_process.returncode = 0
-    mock_popen.return_value = mock_process
+    mock_run.side_effect = [
+        'Script 1 executed',
+        'Raw SQL executed'
+    ]
 
     with pytest.raises(AnsibleExitJson) as result:
         oracle_sqlplus.main()
     
+    assert mock_run.call_count == 2
     assert result.value.args[0]['changed'] == True
-    assert '1 row selected' in result.value.args[0]['sqlplus_output']
+    assert 'Script 1 executed' in result.value.args[0]['sqlplus_output']
+    assert 'Raw SQL executed' in result.value.args[0]['sqlplus_output']
 
-@patch('subprocess.Popen')
-def test_execute_sqlplus_with_substitution_variables(mock_popen, mock_module):
-    set_module_args({
-        'script': '/path/to/test.sql',
-        'username': 'testuser',
-        'password': 'testpass',
-        'database': 'testdb',
-        'substitution_variables': ['var1', 'var2']
-    })
-    
-    mock_process = MagicMock()
-    mock_process.communicate.return_value = (b'Substitution variables applied', b'')
-    mock_process.returncode = 0
-    mock_popen.return_value = mock_process
+@patch.object(oracle_sqlplus.SqlplusSession, 'run')
+def test_execute_sqlplus_loop_parallel(mock_run, tmp_path):
+    module = MagicMock()
+    module.params = {
+        'username': 'testuser', 'password': 'testpass', 'database': 'testdb', 'script': None,
+        'raw_sql': None, 'substitution_variables': [], 'bind_variables': {}, 'env_variables': {},
+        'sysdba': False, 'sysoper': False, 'silent': False, 'nolog': False, 'suppress_login': False,
+        'markup_mode': None, 'restrict': False, 'page_size': 1000, 'max_parallel': 4,
+        'loop': [
+            {'raw_sql': 'SELECT 1 FROM dual', 'database': 'db1'},
+            {'raw_sql': 'SELECT 2 FROM dual', 'database': 'db2'},
+            {'raw_sql': 'SELECT 3 FROM dual', 'database': 'db1'},
+        ],
+    }
+    result = dict(changed=False, sqlplus_output='', execution_time=0, results=[])
+    mock_run.side_effect = lambda sql: sql.replace('SELECT', 'ran')
 
-    with pytest.raises(AnsibleExitJson) as result:
-        oracle_sqlplus.main()
-    
-    assert result.value.args[0]['changed'] == True
-    assert 'Substitution variables applied' in result.value.args[0]['sqlplus_output']
+    oracle_sqlplus.run_loop_parallel(module, result)
 
-@patch('subprocess.Popen')
-def test_execute_sqlplus_with_bind_variables(mock_popen, mock_module):
-    set_module_args({
-        'raw_sql': 'SELECT * FROM test_table WHERE id = :id',
-        'username': 'testuser',
-        'password': 'testpass',
-        'database': 'testdb',
-        'bind_variables': {'id': '1'}
-    })
-    
-    mock_process = MagicMock()
-    mock_process.communicate.return_value = (b'Bind variables applied', b'')
-    mock_process.returncode = 0
-    mock_popen.return_value = mock_process
+    assert mock_run.call_count == 3
+    assert result['changed'] == True
+    assert result['sqlplus_output'] == 'ran 1 FROM dual\nran 2 FROM dual\nran 3 FROM dual'
 
-    with pytest.raises(AnsibleExitJson) as result:
-        oracle_sqlplus.main()
-    
-    assert result.value.args[0]['changed'] == True
-    assert 'Bind variables applied' in result.value.args[0]['sqlplus_output']
+def test_execute_sqlplus_streams_script(mock_popen, tmp_path):
+    script = tmp_path / 'big.sql'
+    script.write_bytes(b'SELECT 1 FROM dual;\n' * 10000)
+    params = {
+        'username': 'testuser', 'password': 'testpass', 'database': 'testdb', 'script': str(script),
+        'raw_sql': None, 'substitution_variables': [], 'bind_variables': {}, 'env_variables': {},
+        'sysdba': False, 'sysoper': False, 'silent': False, 'nolog': False, 'suppress_login': False,
+        'markup_mode': None, 'restrict': False, 'page_size': 1000,
+    }
+    result = dict(changed=False, sqlplus_output='', execution_time=0, results=[])
 
-@patch('subprocess.Popen')
-def test_execute_sqlplus_with_sysdba(mock_popen, mock_module):
-    set_module_args({
-        'script': '/path/to/test.sql',
-        'sysdba': True
-    })
-    
-    mock_process = MagicMock()
-    mock_process.communicate.return_value = (b'Connected as SYSDBA', b'')
-    mock_process.returncode = 0
-    mock_popen.return_value = mock_process
+    process = make_process(b'done')
+    process.stdin = MagicMock()
+    written = []
+    process.stdin.write.side_effect = written.append
+    mock_popen.return_value = process
 
-    with pytest.raises(AnsibleExitJson) as result:
-        oracle_sqlplus.main()
-    
-    assert result.value.args[0]['changed'] == True
-    assert 'Connected as SYSDBA' in result.value.args[0]['sqlplus_output']
+    with patch.object(oracle_sqlplus, 'build_sql_script') as mock_build:
+        oracle_sqlplus.execute_sqlplus(MagicMock(params=params), result)
 
-@patch('subprocess.Popen')
-def test_execute_sqlplus_failure(mock_popen, mock_module):
-    set_module_args({
-        'script': '/path/to/test.sql',
-        'username': 'testuser',
-        'password': 'testpass',
-        'database': 'testdb'
-    })
-    
-    mock_process = MagicMock()
-    mock_process.communicate.return_value = (b'', b'ORA-12345: Test error')
-    mock_process.returncode = 1
-    mock_popen.return_value = mock_process
+    assert mock_build.call_count == 0
+    assert b''.join(written) == script.read_bytes()
+    assert process.stdin.close.call_count == 1
+    assert result['sqlplus_output'] == 'done'
 
-    with pytest.raises(AnsibleFailJson) as result:
-        oracle_sqlplus.main()
-    
-    assert 'SQL*Plus execution failed' in str(result.value)
-    assert 'ORA-12345: Test error' in str(result.value)
+# Stands in for sqlplus: echoes PROMPT text, exits on EXIT [code], writes a non UTF-8 line on
+# BAD and acknowledges every other line
+_FAKE_SQLPLUS = """
+import sys
+for line in sys.stdin:
+    line = line.rstrip('\\n')
+    if line.startswith('PROMPT '):
+        print(line[7:], flush=True)
+    elif line == 'BAD':
+        sys.stdout.buffer.write(b'\\xff\\n')
+        sys.stdout.flush()
+    elif line.upper().startswith('EXIT'):
+        sys.exit(int(line[4:] or 0))
+    elif line and line != '.':
+        print('ran: ' + line, flush=True)
+"""
 
-@patch('subprocess.Popen')
-def test_execute_sqlplus_loop(mock_popen, mock_module):
-    set_module_args({
-        'loop': [
-            {'script': '/path/to/script1.sql'},
-            {'raw_sql': 'SELECT * FROM table2'}
-        ],
-        'username': 'testuser',
-        'password': 'testpass',
-        'database': 'testdb'
-    })
-    
-    mock_process = MagicMock()
-    mock_process.communicate.side_effect = [
-        (b'Script 1 executed', b''),
-        (b'Raw SQL executed', b'')
+@pytest.fixture
+def session():
+    env = dict(oracle_sqlplus._BASE_ENV, PYTHONIOENCODING='utf-8')
+    with oracle_sqlplus.SqlplusSession([sys.executable, '-c', _FAKE_SQLPLUS], env) as session:
+        yield session
+
+def test_sqlplus_session_reuses_process(session):
+    assert session.run('SELECT 1 FROM dual;') == 'ran: SELECT 1 FROM dual;'
+    process = session.process
+    assert session.run("PROMPT caf\u00e9\nSELECT 2 FROM dual;") == 'caf\u00e9\nran: SELECT 2 FROM dual;'
+    assert session.process is process
+    assert session.returncode is None
+
+def test_sqlplus_session_restarts_after_exit(session):
+    assert session.run('SELECT 1 FROM dual;\nEXIT 3') == 'ran: SELECT 1 FROM dual;'
+    assert session.returncode == 3
+    process = session.process
+
+    assert session.run('SELECT 2 FROM dual;') == 'ran: SELECT 2 FROM dual;'
+    assert session.process is not process
+    assert session.returncode is None
+
+def test_sqlplus_session_kills_process_on_read_error(session):
+    with pytest.raises(UnicodeDecodeError):
+        session.run('BAD\n' + 'SELECT 1 FROM dual;\n' * 20000)
+
+    assert session.returncode is not None
+
+def test_execute_sqlplus_kills_process_on_read_error():
+    params = {'script': None, 'raw_sql': 'BAD\n' + 'SELECT 1 FROM dual;\n' * 20000,
+              'substitution_variables': [], 'bind_variables': {}, 'env_variables': {}, 'page_size': 1000}
+    result = dict(changed=False, sqlplus_output='', execution_time=0, results=[])
+    processes = []
+    popen = subprocess.Popen
+
+    def start(*args, **kwargs):
+        processes.append(popen(*args, **kwargs))
+        return processes[-1]
+
+    with patch.object(oracle_sqlplus, 'build_sqlplus_command', return_value=[sys.executable, '-c', _FAKE_SQLPLUS]), \
+         patch('subprocess.Popen', side_effect=start):
+        with pytest.raises(UnicodeDecodeError):
+            oracle_sqlplus.execute_sqlplus(MagicMock(params=params), result)
+
+    assert processes[0].poll() is not None
+
+def test_execute_sqlplus_session_failure(session):
+    module = MagicMock()
+    module.fail_json.side_effect = AnsibleFailJson
+    module.params = {'script': None, 'raw_sql': 'PROMPT ORA-00942: table or view does not exist\nEXIT 1',
+                     'substitution_variables': [], 'bind_variables': {}, 'page_size': 1000}
+    result = dict(changed=False, sqlplus_output='', execution_time=0, results=[])
+
+    with pytest.raises(AnsibleFailJson):
+        oracle_sqlplus.execute_sqlplus(module, result, session)
+
+    assert 'ORA-00942' in module.fail_json.call_args[1]['msg']
+    assert result['changed'] == False
+
+def test_validate_input_rejects_empty_loop_item():
+    module = MagicMock()
+    module.fail_json.side_effect = AnsibleFailJson
+    module.params = {'script': None, 'raw_sql': None, 'loop': [{'raw_sql': 'SELECT 1 FROM dual'}, {}]}
+
+    with pytest.raises(AnsibleFailJson):
+        oracle_sqlplus.validate_input(module)
+
+    assert module.fail_json.call_args[1]['msg'] == "Loop item 2 needs either 'script' or 'raw_sql'"
+
+def test_execute_sqlplus_unreadable_script(mock_popen, tmp_path):
+    params = {
+        'username': 'testuser', 'password': 'testpass', 'database': 'testdb', 'script': str(tmp_path),
+        'raw_sql': None, 'substitution_variables': [], 'bind_variables': {}, 'env_variables': {},
+        'sysdba': False, 'sysoper': False, 'silent': False, 'nolog': False, 'suppress_login': False,
+        'markup_mode': None, 'restrict': False, 'page_size': 1000,
+    }
+    result = dict(changed=False, sqlplus_output='', execution_time=0, results=[])
+
+    with pytest.raises(OSError):
+        oracle_sqlplus.execute_sqlplus(MagicMock(params=params), result)
+
+    assert mock_popen.call_count == 0
+
+def test_validate_input_checks_loop_scripts(tmp_path):
+    script = tmp_path / 'ok.sql'
+    script.write_text('SELECT 1 FROM dual;')
+    module = MagicMock()
+    module.fail_json.side_effect = AnsibleFailJson
+    module.params = {
+        'script': None,
+        'raw_sql': None,
+        'loop': [{'script': str(script)}, {'script': str(script)}, {'script': str(tmp_path)}],
+    }
+
+    with patch('os.stat', wraps=oracle_sqlplus.os.stat) as mock_stat:
+        with pytest.raises(AnsibleFailJson):
+            oracle_sqlplus.validate_input(module)
+
+    assert module.fail_json.call_args[1]['msg'] == f"SQL file {tmp_path} not found"
+    assert mock_stat.call_count == 2
+
+def test_build_sql_script_variables():
+    params = {
+        'script': None,
+        'raw_sql': "SELECT &1, &10 FROM t WHERE id = :id AND ts > '12:30'",
+        'substitution_variables': ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j'],
+        'bind_variables': {'id': '7'},
+    }
+
+    assert oracle_sqlplus.build_sql_script(params) == "SELECT a, j FROM t WHERE id = '7' AND ts > '12:30'"
+
+def test_parse_sqlplus_output():
+    output = '\n'.join([
+        'select id from t1;',
+        '1',
+        '2',
+        '2 rows selected.',
+        '  UPDATE t2 SET x = 1;',
+        '3 rows affected.',
+    ])
+
+    assert oracle_sqlplus.parse_sqlplus_output(output, 1000) == [
+        {'statement': 'select id from t1;', 'output': '1\n2', 'rows_affected': 2},
+        {'statement': '  UPDATE t2 SET x = 1;', 'output': '', 'rows_affected': 3},
     ]
-    mock_process.returncode = 0
-    mock_popen.return_value = mock_process
 
-    with pytest.raises(AnsibleExitJson) as result:
-        oracle_sqlplus.main()
-    
-    assert result.value.args[0]['changed'] == True
-    assert 'Script 1 executed' in result.value.args[0]['sqlplus_output']
-    assert 'Raw SQL executed' in result.value.args[0]['sqlplus_output']
\ No newline at end of file
+def test_parse_sqlplus_output_pages():
+    output = '\n'.join(['SELECT id FROM t1;'] + [str(i) for i in range(5)])
+
+    assert [r['output'] for r in oracle_sqlplus.parse_sqlplus_output(output, 2)] == ['0\n1', '2\n3', '4']
+
+def test_parse_sqlplus_output_ddl_only():
+    output = 'Table created.\n\nIndex created.'
+
+    assert oracle_sqlplus.parse_sqlplus_output(output, 1000) == []
+    assert oracle_sqlplus.parse_sqlplus_output(output, 2) == list(
+        oracle_sqlplus.parse_sqlplus_output_stream(output.split('\n'), 2))
+
+@pytest.mark.parametrize('page_size', [1, 2, 3, 4])
+def test_parse_sqlplus_output_ddl_only_page_boundary(page_size):
+    output = 'Table created.\nIndex created.'
+
+    assert oracle_sqlplus.parse_sqlplus_output(output, page_size) == list(
+        oracle_sqlplus.parse_sqlplus_output_stream(output.split('\n'), page_size))
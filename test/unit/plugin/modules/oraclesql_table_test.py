@@ -0,0 +1,171 @@
+# Copyright: (c) 2024, Andavarapu Sampat Kalyan <sampatkalyana@gmail.com>
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from ansible_collections.andavarapu.oracle_sql.plugins.modules import oraclesql_table
+
+def column(name, type, **options):
+    """column entry with the defaults the argument spec fills in"""
+    col = {'name': name, 'type': type, 'primary_key': False, 'nullable': True, 'unique': False,
+           'default': None, 'check': None, 'comment': None}
+    col.update(options)
+    return col
+
+def table(**options):
+    """module params for the USERS table with a primary key, a NOT NULL column and a comment"""
+    params = {
+        'table_name': 'users',
+        'columns': [
+            column('id', 'NUMBER', primary_key=True),
+            column('username', 'VARCHAR2(50)', nullable=False),
+        ],
+        'indexes': None, 'foreign_keys': None, 'partitioning': None, 'tablespace': None,
+        'temporary': False, 'parallel': None, 'compress': None, 'row_movement': None, 'comment': 'Users',
+    }
+    params.update(options)
+    return params
+
+def existing_state(columns=(), constraints=(), indexes=(), properties=()):
+    """state of the table plan_create(table()) creates, as the dictionary reports it, plus extra rows"""
+    return (
+        oraclesql_table.columns_from_rows([
+            ('ID', 'NUMBER', 22, 'N', None, None, None, None),
+            ('USERNAME', 'VARCHAR2', 50, 'N', None, None, None, None),
+        ] + list(columns)),
+        oraclesql_table.constraints_from_rows([
+            ('PK_USERS', 'P', 'ID', None, None, 'USER NAME', 'PK_USERS', None, None, None),
+            ('SYS_C0010', 'C', 'USERNAME', '"USERNAME" IS NOT NULL', None, 'GENERATED NAME', None, None, None, None),
+        ] + list(constraints)),
+        oraclesql_table.indexes_from_rows([
+            ('PK_USERS', 'NORMAL', 'UNIQUE', 'ID'),
+        ] + list(indexes)),
+        oraclesql_table.properties_from_rows([
+            ('USERS_TS', 'DISABLED', '1', 'DISABLED', 'Users'),
+        ] + list(properties)),
+    )
+
+def test_plan_create():
+    params = table(columns=[
+        column('id', 'NUMBER', primary_key=True),
+        column('username', 'VARCHAR2(50)', nullable=False, default="'guest'", unique=True),
+        column('age', 'NUMBER', check='age > 0', comment='Age in years'),
+    ], tablespace='users_ts', parallel=4)
+
+    assert oraclesql_table.plan_create(params) == [
+        "CREATE TABLE USERS (ID NUMBER, USERNAME VARCHAR2(50) DEFAULT 'guest' NOT NULL, AGE NUMBER, "
+        "CONSTRAINT PK_USERS PRIMARY KEY (ID), CONSTRAINT UK_USERS_USERNAME UNIQUE (USERNAME), "
+        "CONSTRAINT CK_USERS_AGE CHECK (age > 0)) TABLESPACE USERS_TS PARALLEL 4",
+        "COMMENT ON COLUMN USERS.AGE IS 'Age in years'",
+        "COMMENT ON TABLE USERS IS 'Users'",
+    ]
+
+def test_plan_changes_unchanged_table():
+    assert oraclesql_table.plan_changes('users', existing_state(), table()) == []
+
+def test_plan_changes_columns():
+    state = existing_state(columns=[
+        ('OLD1', 'DATE', 7, 'Y', None, None, None, None),
+        ('OLD2', 'DATE', 7, 'Y', None, None, None, None),
+    ])
+    params = table(columns=[
+        column('id', 'NUMBER', primary_key=True),
+        column('username', 'VARCHAR2(100)', nullable=False),
+        column('email', 'VARCHAR2(200)', nullable=False, default="'n/a'"),
+    ])
+
+    assert oraclesql_table.plan_changes('users', state, params) == [
+        "ALTER TABLE USERS MODIFY USERNAME VARCHAR2(100)",
+        "ALTER TABLE USERS ADD EMAIL VARCHAR2(200) DEFAULT 'n/a' NOT NULL",
+        "ALTER TABLE USERS DROP (OLD1, OLD2)",
+    ]
+
+def test_plan_changes_column_types_compare_normalized():
+    state = existing_state(columns=[
+        ('AGE', 'NUMBER', 22, 'Y', 3, 0, None, None),
+    ])
+    params = table(columns=[
+        column('id', 'number', primary_key=True),
+        column('username', 'varchar2( 50 )', nullable=False),
+        column('age', 'NUMBER(3)'),
+    ])
+
+    assert oraclesql_table.plan_changes('users', state, params) == []
+
+def test_plan_changes_clears_column_comment():
+    state = existing_state(columns=[
+        ('AGE', 'NUMBER', 22, 'Y', None, None, None, 'Age in years'),
+    ])
+    params = table(columns=table()['columns'] + [column('age', 'NUMBER')])
+
+    assert oraclesql_table.plan_changes('users', state, params) == [
+        "COMMENT ON COLUMN USERS.AGE IS ''",
+    ]
+
+FK_ROWS = [
+    ('FK_USERS_ROLES', 'R', 'ROLE_ID', None, 'PK_ROLES', 'USER NAME', None, 'ROLES', 'ID', 'CASCADE'),
+]
+
+def foreign_key(**options):
+    fk = {'name': 'fk_users_roles', 'columns': ['role_id'], 'reference_table': 'roles',
+          'reference_columns': ['id'], 'on_delete': 'CASCADE'}
+    fk.update(options)
+    return fk
+
+def test_plan_changes_unchanged_foreign_key():
+    state = existing_state(columns=[('ROLE_ID', 'NUMBER', 22, 'Y', None, None, None, None)], constraints=FK_ROWS)
+    params = table(columns=table()['columns'] + [column('role_id', 'NUMBER')], foreign_keys=[foreign_key()])
+
+    assert oraclesql_table.plan_changes('users', state, params) == []
+
+@pytest.mark.parametrize('options,clause', [
+    ({'on_delete': 'NO ACTION'}, ""),
+    ({'on_delete': 'SET NULL'}, " ON DELETE SET NULL"),
+    ({'reference_table': 'groups'}, " ON DELETE CASCADE"),
+])
+def test_plan_changes_changed_foreign_key(options, clause):
+    state = existing_state(columns=[('ROLE_ID', 'NUMBER', 22, 'Y', None, None, None, None)], constraints=FK_ROWS)
+    fk = foreign_key(**options)
+    params = table(columns=table()['columns'] + [column('role_id', 'NUMBER')], foreign_keys=[fk])
+
+    assert oraclesql_table.plan_changes('users', state, params) == [
+        "ALTER TABLE USERS DROP CONSTRAINT FK_USERS_ROLES",
+        f"ALTER TABLE USERS ADD CONSTRAINT FK_USERS_ROLES FOREIGN KEY (ROLE_ID) "
+        f"REFERENCES {fk['reference_table'].upper()} (ID){clause}",
+    ]
+
+def test_plan_changes_indexes():
+    state = existing_state(indexes=[
+        ('IDX_USERS_OLD', 'NORMAL', 'NONUNIQUE', 'USERNAME'),
+    ])
+    params = table(indexes=[{'name': 'idx_users_name', 'columns': ['username'], 'unique': False, 'type': 'BTREE'}])
+
+    assert oraclesql_table.plan_changes('users', state, params) == [
+        "CREATE INDEX IDX_USERS_NAME ON USERS (USERNAME)",
+        "DROP INDEX IDX_USERS_OLD",
+    ]
+
+def test_plan_changes_table_properties():
+    params = table(tablespace='users_ts', parallel=4, compress=False, row_movement=True, comment='All users')
+
+    assert oraclesql_table.plan_changes('users', existing_state(), params) == [
+        "ALTER TABLE USERS PARALLEL 4",
+        "ALTER TABLE USERS ENABLE ROW MOVEMENT",
+        "COMMENT ON TABLE USERS IS 'All users'",
+    ]
+
+@pytest.mark.parametrize('name', ['users\n', 'users; DROP TABLE x', '1users', 'us ers', ''])
+def test_q_rejects_invalid_identifiers(name):
+    with pytest.raises(ValueError):
+        oraclesql_table._q(name)
+
+def test_execute_statements_describes_list_type_once():
+    cursor = MagicMock()
+    with patch.dict(oraclesql_table._LIST_TYPES, clear=True):
+        oraclesql_table.execute_statements(cursor, ['CREATE INDEX IDX_A ON USERS (ID)'])
+        oraclesql_table.execute_statements(cursor, ['DROP INDEX IDX_A'])
+
+    assert cursor.connection.gettype.call_count == 1
+    assert cursor.execute.call_count == 2
+    assert cursor.connection.gettype.return_value.newobject.call_args[0][0] == ['DROP INDEX IDX_A']
@@ -0,0 +1,76 @@
+# Copyright: (c) 2024, Andavarapu Sampat Kalyan <sampatkalyana@gmail.com>
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from ansible_collections.andavarapu.oracle_sql.plugins.modules import oraclesql_user
+
+@pytest.fixture
+def session_pool():
+    with patch.dict(oraclesql_user._POOLS, clear=True), \
+         patch.object(oraclesql_user.cx_Oracle, 'SessionPool') as session_pool:
+        yield session_pool
+
+def test_get_pool_password_auth(session_pool):
+    pool = oraclesql_user.get_pool('scott/tiger@db.example.com:1521/orclpdb')
+
+    assert session_pool.call_args[1]['user'] == 'scott'
+    assert session_pool.call_args[1]['password'] == 'tiger'
+    assert session_pool.call_args[1]['dsn'] == 'db.example.com:1521/orclpdb'
+    assert session_pool.call_args[1]['homogeneous'] == True
+    assert oraclesql_user.get_pool('scott/tiger@db.example.com:1521/orclpdb') is pool
+    assert session_pool.call_count == 1
+
+def test_get_pool_external_auth(session_pool):
+    oraclesql_user.get_pool('/@walletalias')
+
+    assert 'user' not in session_pool.call_args[1]
+    assert session_pool.call_args[1]['dsn'] == 'walletalias'
+    assert session_pool.call_args[1]['externalauth'] == True
+    assert session_pool.call_args[1]['homogeneous'] == False
+
+@pytest.mark.parametrize('privilege,pattern', [
+    ('CREATE SESSION', '_PRIVILEGE_RE'),
+    ('dba', '_PRIVILEGE_RE'),
+    ('SELECT, UPDATE ON hr.employees', '_OBJECT_PRIVILEGE_RE'),
+])
+def test_privilege_patterns_accept(privilege, pattern):
+    assert getattr(oraclesql_user, pattern).fullmatch(privilege)
+
+@pytest.mark.parametrize('privilege', ['CREATE SESSION\n', 'DBA; DROP USER x', 'SELECT ON hr.employees\n', ''])
+def test_privilege_patterns_reject(privilege):
+    assert not oraclesql_user._PRIVILEGE_RE.fullmatch(privilege)
+    assert not oraclesql_user._OBJECT_PRIVILEGE_RE.fullmatch(privilege)
+
+def test_classify_privileges_mixed_list():
+    privileges = [
+        'CREATE SESSION', 'READ ON DIRECTORY data_dir', '"MyRole"', 'INHERIT PRIVILEGES ON USER scott',
+        'UPDATE (salary, bonus) ON hr.emp', 'SELECT, INSERT ON hr.employees', 'dba', 'DBA; DROP USER x',
+        'SELECT ON hr.employees; DROP USER x', 'CREATE SESSION ON',
+    ]
+
+    assert oraclesql_user.classify_privileges(privileges) == (
+        ['CREATE SESSION', '"MyRole"', 'dba'],
+        ['READ ON DIRECTORY data_dir', 'INHERIT PRIVILEGES ON USER scott',
+         'UPDATE (salary, bonus) ON hr.emp', 'SELECT, INSERT ON hr.employees'],
+        ['DBA; DROP USER x', 'SELECT ON hr.employees; DROP USER x', 'CREATE SESSION ON'],
+    )
+
+def test_create_or_update_user_grants_mixed_list():
+    module = MagicMock()
+    module.exit_json.side_effect = SystemExit
+    module.params = {'username': 'scott', 'password': 'tiger', 'state': 'present',
+                     'privileges': ['CREATE SESSION', 'READ ON DIRECTORY data_dir', 'RESOURCE']}
+    connection = MagicMock()
+    cursor = connection.cursor.return_value
+    cursor.fetchone.return_value = (1,)
+
+    with pytest.raises(SystemExit):
+        oraclesql_user.create_or_update_user(module, connection)
+
+    statements = [call[0][0] for call in cursor.execute.call_args_list]
+    assert statements[-2:] == [
+        'GRANT CREATE SESSION, RESOURCE TO scott',
+        'GRANT READ ON DIRECTORY data_dir TO scott',
+    ]